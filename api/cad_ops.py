@@ -1,8 +1,18 @@
 # api/cad_ops.py (hardened)
 from __future__ import annotations
-from typing import Tuple, Dict, Any, List, Iterable, Optional
+from typing import Tuple, Dict, Any, List, Iterable, Optional, Callable
 import math
+import weakref
+from copy import copy
+from functools import lru_cache
+import numpy as np
 import cadquery as cq
+from OCP.BOPAlgo import BOPAlgo_PaveFiller
+from OCP.BRepAlgoAPI import BRepAlgoAPI_Common, BRepAlgoAPI_Cut
+from OCP.BRepBuilderAPI import BRepBuilderAPI_Copy, BRepBuilderAPI_MakeFace, BRepBuilderAPI_MakePolygon
+from OCP.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakeRevol
+from OCP.gp import gp_Ax1, gp_Ax2, gp_Dir, gp_Pnt
+from OCP.TopTools import TopTools_ListOfShape
 from .models import Operation, Stock
 
 # =========================
@@ -48,9 +58,27 @@ def _wp_from(work: cq.Workplane, plane: str | None):
     # default XY
     return work.workplane()
 
+# (solid, selector) → 加工面上の Plane。
+# 同じ solid に対する ">Z" などの面選択・平面チェックを op ごとにやり直さない。
+# Workplane そのものは ctx（pendingWires など）を持つので共有せず、Plane だけ覚えておく。
+_FACE_PLANE_CACHE: "weakref.WeakKeyDictionary[cq.Shape, Dict[str, cq.Plane]]" = weakref.WeakKeyDictionary()
+
+
 def _must_single_planar_face(work: cq.Workplane, selector: str | None) -> cq.Workplane:
     """Reduce selector to a single planar face and return a WP on that face."""
     sel = selector or ">Z"
+    solid = work.val() if work.objects else None
+    per_solid = _FACE_PLANE_CACHE.get(solid) if isinstance(solid, cq.Shape) else None
+    if per_solid is not None and sel in per_solid:
+        return cq.Workplane(copy(per_solid[sel]))
+
+    wp = _select_single_planar_face(work, sel)
+    if isinstance(solid, cq.Shape):
+        _FACE_PLANE_CACHE.setdefault(solid, {})[sel] = copy(wp.plane)
+    return wp
+
+
+def _select_single_planar_face(work: cq.Workplane, sel: str) -> cq.Workplane:
     try:
         faces = work.faces(sel)
         face_val = faces.val()  # raises if none/ambiguous
@@ -71,13 +99,100 @@ def _must_single_planar_face(work: cq.Workplane, selector: str | None) -> cq.Wor
     except Exception as ex:
         raise OpError(f"Failed to create workplane on selected face: {ex}") from ex
 
+# BoundingBox は BRep 全体を走査するので、同じ shape については 1 回だけ計算する。
+# op は常に新しい shape を返すため、shape 単位のキャッシュなら無効化は不要。
+_BBOX_CACHE: "weakref.WeakKeyDictionary[cq.Shape, cq.BoundBox]" = weakref.WeakKeyDictionary()
+
+
+def _cached_bbox(work: cq.Workplane) -> cq.BoundBox:
+    shape = work.val()
+    bb = _BBOX_CACHE.get(shape)
+    if bb is None:
+        bb = shape.BoundingBox()
+        _BBOX_CACHE[shape] = bb
+    return bb
+
+# =========================
+# primitive tools
+# =========================
+# 円柱・直方体の工具は wire→face→prism を経由せず BRepPrimAPI で直接作る。
+# 解析面だけのソリッドになるので、後段の BOP が扱う中間 sub-shape も減る。
+
+def _cylinder_into_plane(
+    plane: cq.Plane, x: float, y: float, radius: float, depth: float
+) -> cq.Solid:
+    """plane 上の (x, y) から法線の逆向き（材料側）へ |depth| 伸びる円柱。"""
+    base = plane.toWorldCoords((x, y))
+    return cq.Solid.makeCylinder(radius, abs(depth), base, plane.zDir.multiply(-1))
+
+
+def _box_into_plane(
+    plane: cq.Plane, x: float, y: float, width: float, height: float, depth: float
+) -> cq.Solid:
+    """plane 上の (x, y) を中心とする width x height の矩形を、材料側へ |depth| 掘る直方体。"""
+    depth = abs(depth)
+    corner = (
+        plane.toWorldCoords((x - width / 2.0, y - height / 2.0))
+        - plane.zDir.multiply(depth)
+    )
+    ax = gp_Ax2(corner.toPnt(), plane.zDir.toDir(), plane.xDir.toDir())
+    return cq.Solid(BRepPrimAPI_MakeBox(ax, width, height, depth).Solid())
+
+
+def _revolve_xz_polygon(points: List[List[float]], name: str) -> cq.Solid:
+    """world XZ 平面上の閉じた多角形 (x=r, y=0, z) を Z 軸まわりに 360° 回転したソリッド。"""
+    polygon = BRepBuilderAPI_MakePolygon()
+    for x, y, z in points:
+        polygon.Add(gp_Pnt(x, y, z))
+    polygon.Close()
+    if not polygon.IsDone():
+        raise OpError(f"{name}: プロファイルから閉じた輪郭を作れませんでした。")
+
+    face = BRepBuilderAPI_MakeFace(polygon.Wire(), True)
+    if not face.IsDone():
+        raise OpError(f"{name}: プロファイル輪郭から面を作れませんでした。")
+
+    revol = BRepPrimAPI_MakeRevol(
+        face.Face(), gp_Ax1(gp_Pnt(0, 0, 0), gp_Dir(0, 0, 1)), 2.0 * math.pi
+    )
+    return cq.Shape.cast(revol.Shape())
+
+
+def _z_cylinder(radius: float, z_start: float, length: float) -> cq.Solid:
+    """Z 軸上、z_start から +Z へ length の円柱（旋盤系工具用）。"""
+    return cq.Solid.makeCylinder(radius, length, cq.Vector(0, 0, z_start), cq.Vector(0, 0, 1))
+
 # =========================
 # stock builders
 # =========================
 
 def build_stock(stock: Stock) -> cq.Workplane:
     p = stock.params or {}
-    if stock.type == "block":
+    try:
+        params_key = tuple(sorted(p.items()))
+        hash(params_key)
+    except TypeError:
+        # 入れ子の dict/list など hash できない params はキャッシュしない
+        return _make_stock(stock.type, p)
+
+    cached, bb = _build_stock_cached(stock.type, params_key)
+    # キャッシュした shape を下流で共有しないよう、毎回コピーを渡す
+    shape = cq.Shape.cast(BRepBuilderAPI_Copy(cached.wrapped).Shape())
+    # コピーは形状が同じなので BoundingBox も同じ。最初の lathe op で BRep を走査しなくて済むよう先に入れておく
+    _BBOX_CACHE[shape] = bb
+    return cq.Workplane("XY").add(shape)
+
+
+@lru_cache(maxsize=64)
+def _build_stock_cached(
+    stock_type: str, params_key: Tuple[Tuple[str, Any], ...]
+) -> Tuple[cq.Shape, cq.BoundBox]:
+    shape = _make_stock(stock_type, dict(params_key)).val()
+    return shape, shape.BoundingBox()
+
+
+def _make_stock(stock_type: str, p: Dict[str, Any]) -> cq.Workplane:
+    if stock_type == "block":
         _require_params(p, ["w", "d", "h"])
         w = _f(p.get("w", 50), "w")
         d = _f(p.get("d", p.get("l", 50)), "d")  # depth/length
@@ -85,20 +200,20 @@ def build_stock(stock: Stock) -> cq.Workplane:
         # centered in X/Y; extrude in +Z direction
         return cq.Workplane("XY").box(w, d, h, centered=(True, True, False))
 
-    if stock.type == "cylinder":
+    if stock_type == "cylinder":
         _require_params(p, ["dia", "h"])
         dia = _f(p.get("dia", p.get("d", 50)), "dia")
         h   = _f(p.get("h", 50), "h")
         return cq.Workplane("XY").circle(dia / 2.0).extrude(h)
 
-    if stock.type == "mesh":
+    if stock_type == "mesh":
         # STEP1: import is optional; keep placeholder as block for now
         w = _f(p.get("w", 50), "w")
         d = _f(p.get("d", 50), "d")
         h = _f(p.get("h", 20), "h")
         return cq.Workplane("XY").box(w, d, h, centered=True)
 
-    raise ValueError(f"unsupported stock.type={stock.type}")
+    raise ValueError(f"unsupported stock.type={stock_type}")
 
 
 # -----------------------------
@@ -111,15 +226,15 @@ def _lathe_axis_info(before: cq.Workplane) -> Tuple[float, float, float]:
       - zmin, zmax : Z方向の範囲
       - radius     : おおよその外径半径（BoundingBox から推定）
     """
-    bb = before.val().BoundingBox()
+    bb = _cached_bbox(before)
     zmin, zmax = bb.zmin, bb.zmax
     radius = max(abs(bb.xmin), abs(bb.xmax), abs(bb.ymin), abs(bb.ymax))
     return zmin, zmax, radius
 
 
-def _parse_profile_points(op: Operation) -> List[Tuple[float, float]]:
+def _parse_profile_points(op: Operation) -> Tuple[np.ndarray, np.ndarray]:
     """
-    params.profile から (z_profile, r) のリストを取り出す。
+    params.profile から z_profile[], r[] の配列を取り出す。
     - z_profile: 心押し側端面からの距離
     - r: 半径 (d/2)
 
@@ -130,116 +245,110 @@ def _parse_profile_points(op: Operation) -> List[Tuple[float, float]]:
     if not isinstance(prof, list) or len(prof) < 2:
         raise OpError(f"{op.op}: params.profile は 2 点以上の配列で指定してください。")
 
-    result: List[Tuple[float, float]] = []
-    prev_z = None
-    prev_d = None
-
+    raw_z: List[Any] = []
+    raw_d: List[Any] = []
     for i, p in enumerate(prof):
         if not isinstance(p, dict):
             raise OpError(f"{op.op}: profile[{i}] は {{'z':..,'d':..}} 形式で指定してください。")
-
         try:
-            z = float(p["z"])
-            d = float(p["d"])
+            raw_z.append(p["z"])
+            raw_d.append(p["d"])
         except KeyError as ex:
             raise OpError(f"{op.op}: profile[{i}] に必須キー {ex} がありません。")
-        except Exception as ex:
-            raise OpError(f"{op.op}: profile[{i}] の z/d を float に変換できません: {ex}")
 
-        if d <= 0:
-            raise OpError(f"{op.op}: profile[{i}].d は正の直径を指定してください。")
+    try:
+        z = np.asarray(raw_z, dtype=np.float64)
+        d = np.asarray(raw_d, dtype=np.float64)
+    except (TypeError, ValueError):
+        # どの点が壊れているかはまとめて変換すると分からないので、1 点ずつ調べ直す
+        for i, (zi, di) in enumerate(zip(raw_z, raw_d)):
+            try:
+                float(zi)
+                float(di)
+            except Exception as ex:
+                raise OpError(f"{op.op}: profile[{i}] の z/d を float に変換できません: {ex}")
+        raise
 
-        # 同一点連続だけ禁止（同じ z で d が変わる＝垂直壁は OK）
-        if prev_z is not None and prev_d is not None:
-            if z == prev_z and d == prev_d:
-                raise OpError(
-                    f"{op.op}: profile[{i-1}] と profile[{i}] が同一座標です (z={z}, d={d})。"
-                )
+    bad = np.flatnonzero(~(np.isfinite(z) & np.isfinite(d)))
+    if bad.size:
+        raise OpError(f"{op.op}: profile[{bad[0]}] の z/d は有限値で指定してください。")
 
-        prev_z, prev_d = z, d
-        r = d / 2.0
-        result.append((z, r))
+    bad = np.flatnonzero(d <= 0)
+    if bad.size:
+        raise OpError(f"{op.op}: profile[{bad[0]}].d は正の直径を指定してください。")
 
-    return result
+    # 同一点連続だけ禁止（同じ z で d が変わる＝垂直壁は OK）
+    dup = np.flatnonzero((z[1:] == z[:-1]) & (d[1:] == d[:-1]))
+    if dup.size:
+        i = int(dup[0]) + 1
+        raise OpError(
+            f"{op.op}: profile[{i-1}] と profile[{i}] が同一座標です (z={z[i]}, d={d[i]})。"
+        )
+
+    return z, d / 2.0
 
 
 def _profile_to_world(
-    before: cq.Workplane, profile_zr: List[Tuple[float, float]]
-) -> Tuple[List[Tuple[float, float]], float, float, float]:
+    before: cq.Workplane, z_profile: np.ndarray
+) -> Tuple[np.ndarray, float, float, float]:
     """
-    (z_profile, r) → (z_world, r) に変換。
+    z_profile → z_world に変換。
     心押し側端面 = zmin とみなして:
       z_world = zmin + z_profile
     """
     zmin, zmax, stock_r = _lathe_axis_info(before)
+    return zmin + z_profile, zmin, zmax, stock_r
 
-    mapped: List[Tuple[float, float]] = []
-    for (z_profile, r) in profile_zr:
-        z_world = zmin + z_profile
-        mapped.append((z_world, r))
-
-    return mapped, zmin, zmax, stock_r
 
-
-def _dedupe_points(points: List[cq.Vector]) -> List[cq.Vector]:
+def _dedupe_points(points: np.ndarray) -> np.ndarray:
     """
     連続する同一座標の点を削除（0長さエッジを避ける）
+    points: (N, 3) の座標配列
     """
-    if not points:
+    if len(points) < 2:
         return points
 
-    deduped = [points[0]]
-    for p in points[1:]:
-        last = deduped[-1]
-        if (abs(p.x - last.x) > 1e-9) or (abs(p.y - last.y) > 1e-9) or (abs(p.z - last.z) > 1e-9):
-            deduped.append(p)
-    return deduped
+    keep = np.empty(len(points), dtype=bool)
+    keep[0] = True
+    keep[1:] = (np.abs(np.diff(points, axis=0)) > 1e-9).any(axis=1)
+    return points[keep]
 
 
 def _make_profile_solid(
-    before: cq.Workplane,
     op: Operation,
+    z_world: np.ndarray,
+    r: np.ndarray,
 ) -> cq.Solid:
     """
-    params.profile から、Z軸まわりの回転体ソリッドを生成する。
-    - XZ 平面上で、
-        (r, z_world) の polyline + 軸(r=0) で 2D ループを作り、
-      それを Z 軸まわりに 360° 回転。
+    (z_world[], r[]) から、Z軸まわりの回転体ソリッドを生成する。
+    - world XZ 平面上で、
+        (r, z_world) の折れ線 + 軸(r=0) で閉じた多角形 face を作り、
+      それを BRepPrimAPI_MakeRevol で Z 軸まわりに 360° 回転。
     """
-    profile_zr = _parse_profile_points(op)
-    mapped, zmin, zmax, stock_r = _profile_to_world(before, profile_zr)
-
-    z_vals = [zw for (zw, _) in mapped]
-
-    # XZ 平面上に 2D ループを作る
+    # world XZ 平面 (y=0) 上に 2D ループを作る
     #   - outer: プロファイル r(z)
     #   - inner: 軸 r=0 側で閉じる
-    outer_pts = [cq.Vector(r, z, 0.0) for (z, r) in mapped]
-    inner_pts = [cq.Vector(0.0, z, 0.0) for z in reversed(z_vals)]
-
-    outer_pts = _dedupe_points(outer_pts)
-    inner_pts = _dedupe_points(inner_pts)
-
-    if len(outer_pts) < 2 or len(inner_pts) < 2:
+    #   outer → inner を 1 つの (2n, 3) 配列に直接詰める
+    n = len(z_world)
+    loop = np.empty((2 * n, 3))
+    loop[:n, 0] = r
+    loop[:n, 2] = z_world
+    loop[n:, 0] = 0.0
+    loop[n:, 2] = z_world[::-1]
+    loop[:, 1] = 0.0
+
+    if len(_dedupe_points(loop[:n])) < 2 or len(_dedupe_points(loop[n:])) < 2:
         raise OpError(f"{op.op}: 有効なプロファイル点が不足しています。")
 
-    wp = cq.Workplane("XZ")
-    wire = (
-        wp.polyline(outer_pts)
-          .polyline(inner_pts)
-          .close()
-    )
+    # 1 本の閉じた多角形にする（連続重複・つなぎ目・閉じ目の重複点は落とす）
+    loop = _dedupe_points(loop)
+    if len(loop) > 1 and not (np.abs(loop[-1] - loop[0]) > 1e-9).any():
+        loop = loop[:-1]
 
-    # ★ここを修正：XZ ワークプレーン上で Z 軸まわりに回転させる
-    #   axisStart/axisEnd は Workplane ローカル座標で指定するので
-    #   「(0,0,0) → (0,1,0)」が world Z 軸に対応する
-    profile_wp = wire.revolve(360.0, (0, 0, 0), (0, 1, 0))
-    profile_solid = profile_wp.val()
+    return _revolve_xz_polygon(loop.tolist(), op.op)
 
-    return profile_solid
 
-
-def _op_lathe_face_cut(before: cq.Workplane, op: Operation) -> cq.Workplane:
+def _cutter_lathe_face_cut(before: cq.Workplane, op: Operation) -> cq.Workplane:
     depth = _f(op.params.get("depth", 0), "depth")
     if depth <= 0:
         raise OpError("lathe:face_cut depth must be positive")
@@ -247,12 +356,10 @@ def _op_lathe_face_cut(before: cq.Workplane, op: Operation) -> cq.Workplane:
     wp = _must_single_planar_face(before, ">Z")
 
     _, _, radius = _lathe_axis_info(before)
-    cut_solid = wp.circle(radius * 1.2).extrude(-abs(depth))
-    after = before.cut(cut_solid)
-    return after
+    return wp.newObject([_cylinder_into_plane(wp.plane, 0.0, 0.0, radius * 1.2, depth)])
 
 
-def _op_lathe_turn_od(before: cq.Workplane, op: Operation) -> cq.Workplane:
+def _cutter_lathe_turn_od(before: cq.Workplane, op: Operation) -> cq.Workplane:
     target_dia = _f(op.params.get("target_dia", 0), "target_dia")
     length = _f(op.params.get("length", 0), "length")
 
@@ -273,24 +380,18 @@ def _op_lathe_turn_od(before: cq.Workplane, op: Operation) -> cq.Workplane:
 
     z_start = zmax - length
 
-    outer = (
-        cq.Workplane("XY")
-        .workplane(offset=z_start)
-        .circle(stock_r * 1.05)
-        .extrude(length)
-    )
-    inner = (
-        cq.Workplane("XY")
-        .workplane(offset=z_start)
-        .circle(target_r)
-        .extrude(length)
+    # 外径側の削り代（target_r〜stock_r*1.05 の円環）を断面の回転で直接作る。
+    # 外側円柱 - 内側円柱 の Boolean を 1 回省ける。
+    r_out = stock_r * 1.05
+    z_end = z_start + length
+    shell = _revolve_xz_polygon(
+        [[target_r, 0.0, z_start], [r_out, 0.0, z_start], [r_out, 0.0, z_end], [target_r, 0.0, z_end]],
+        "lathe:turn_od",
     )
-    cut_shell = outer.cut(inner)
-    after = before.cut(cut_shell)
-    return after
+    return cq.Workplane("XY").add(shell)
 
 
-def _op_lathe_bore_id(before: cq.Workplane, op: Operation) -> cq.Workplane:
+def _cutter_lathe_bore_id(before: cq.Workplane, op: Operation) -> cq.Workplane:
     target_dia = _f(op.params.get("target_dia", 0), "target_dia")
     length = _f(op.params.get("length", 0), "length")
 
@@ -309,14 +410,7 @@ def _op_lathe_bore_id(before: cq.Workplane, op: Operation) -> cq.Workplane:
         raise OpError("lathe:bore_id target_dia must be smaller than stock outer diameter")
 
     z_start = zmax - length
-    cut_solid = (
-        cq.Workplane("XY")
-        .workplane(offset=z_start)
-        .circle(target_r)
-        .extrude(length)
-    )
-    after = before.cut(cut_solid)
-    return after
+    return cq.Workplane("XY").add(_z_cylinder(target_r, z_start, length))
 
 
 def _op_lathe_turn_od_profile(before: cq.Workplane, op: Operation) -> cq.Workplane:
@@ -330,24 +424,25 @@ def _op_lathe_turn_od_profile(before: cq.Workplane, op: Operation) -> cq.Workpla
     - z: 心押し側端面からの距離
     - d: 仕上がり直径
     """
-    profile_zr = _parse_profile_points(op)
-    mapped, zmin, zmax, stock_r = _profile_to_world(before, profile_zr)
+    z_profile, r = _parse_profile_points(op)
+    z_world, zmin, zmax, stock_r = _profile_to_world(before, z_profile)
 
     # ストック外に出ていないかチェック
-    for i, (z_world, r) in enumerate(mapped):
-        if r > stock_r + 1e-6:
-            raise OpError(
-                f"{op.op}: profile[{i}] の半径 r={r} が現在の外径 {stock_r} を超えています。"
-            )
+    bad = np.flatnonzero(r > stock_r + 1e-6)
+    if bad.size:
+        i = int(bad[0])
+        raise OpError(
+            f"{op.op}: profile[{i}] の半径 r={r[i]} が現在の外径 {stock_r} を超えています。"
+        )
 
-    profile_solid = _make_profile_solid(before, op)
+    profile_solid = _make_profile_solid(op, z_world, r)
 
     # 仕上がり形状 = 現在のワーク ∩ プロファイル回転体
     after = before.intersect(profile_solid)
     return after
 
 
-def _op_lathe_bore_id_profile(before: cq.Workplane, op: Operation) -> cq.Workplane:
+def _cutter_lathe_bore_id_profile(before: cq.Workplane, op: Operation) -> cq.Workplane:
     """
     内径プロファイル加工 (Phase1: polyline ベース)
 
@@ -358,248 +453,533 @@ def _op_lathe_bore_id_profile(before: cq.Workplane, op: Operation) -> cq.Workpla
     - z: 心押し側端面からの距離
     - d: 仕上がり直径
     """
-    profile_zr = _parse_profile_points(op)
-    mapped, zmin, zmax, stock_r = _profile_to_world(before, profile_zr)
+    z_profile, r = _parse_profile_points(op)
+    z_world, zmin, zmax, stock_r = _profile_to_world(before, z_profile)
 
     # 外径を超えていないかチェック
-    for i, (z_world, r) in enumerate(mapped):
-        if r >= stock_r - 1e-6:
-            raise OpError(
-                f"{op.op}: profile[{i}] の半径 r={r} が外径 {stock_r} 以上です。"
-            )
-
-    profile_solid = _make_profile_solid(before, op)
+    bad = np.flatnonzero(r >= stock_r - 1e-6)
+    if bad.size:
+        i = int(bad[0])
+        raise OpError(
+            f"{op.op}: profile[{i}] の半径 r={r[i]} が外径 {stock_r} 以上です。"
+        )
 
     # 内径 = 現在のワークから穴ソリッドをくり抜く
-    after = before.cut(profile_solid)
-    return after
+    return before.newObject([_make_profile_solid(op, z_world, r)])
+
+
+# lathe 系で before.cut(工具) になる op。工具形状だけを返す。
+# turn_od_profile は before ∩ 回転体（intersect）なので含めない。
+_LATHE_CUTTERS = {
+    "lathe:face_cut": _cutter_lathe_face_cut,
+    "lathe:turn_od": _cutter_lathe_turn_od,
+    "lathe:bore_id": _cutter_lathe_bore_id,
+    "lathe:bore_id_profile": _cutter_lathe_bore_id_profile,
+}
 
 # =========================
-# operation appliers
+# cutter compilers (subtractive mill/drill ops)
 # =========================
+# 各コンパイラは params の検証・数値変換をここで 1 回だけ済ませ、
+# before を受け取って「工具形状 (cut_solid)」だけを作るクロージャを返す。
+# Boolean (before.cut) は呼び出し側でまとめて行う。
 
-def apply_op(before: cq.Workplane, op: Operation) -> Tuple[cq.Workplane, cq.Workplane]:
-    """
-    Returns (after, removed)
-      solid  = after
-      removed= before - after
-    """
-    if before is None:
-        raise OpError("No stock solid. First operation must build stock")
+CutterFn = Callable[[cq.Workplane], cq.Workplane]
 
-    name = op.op
-    params = op.params or {}
-    selector = op.selector or ">Z"
 
-    after = before
+def _compile_mill_face(params: Dict[str, Any], selector: str) -> CutterFn:
+    # Face mill: cut a large rectangle covering the selected face by depth
+    _require_params(params, ["depth"])
+    depth = _f(params.get("depth", 1.0), "depth")
 
-    try:
-        if name == "mill:face":
-            # Face mill: cut a large rectangle covering the selected face by depth
-            _require_params(params, ["depth"])
-            depth = _f(params.get("depth", 1.0), "depth")
-            # locate a single planar face and workplane on it
-            wp = _must_single_planar_face(before, selector)
-
-            # bounding box from before (support different bbox attribute names)
-            bb = before.val().BoundingBox()
-            try:
-                width = bb.xlen * 1.1
-                height = bb.ylen * 1.1
-            except Exception:
-                width = (bb.xmax - bb.xmin) * 1.1
-                height = (bb.ymax - bb.ymin) * 1.1
+    def build(before: cq.Workplane) -> cq.Workplane:
+        # locate a single planar face and workplane on it
+        wp = _must_single_planar_face(before, selector)
 
-            try:
-                cut_solid = wp.rect(width, height).extrude(-abs(depth))
-                after = before.cut(cut_solid)
-            except ValueError as vex:
-                raise OpError(f"mill:face failed during cut: {vex}")
-            except Exception as ex:
-                raise OpError(f"mill:face failed: {ex}")
+        # bounding box from before
+        bb = _cached_bbox(before)
+        width = bb.xlen * 1.1
+        height = bb.ylen * 1.1
+
+        try:
+            return wp.newObject([_box_into_plane(wp.plane, 0.0, 0.0, width, height, depth)])
+        except ValueError as vex:
+            raise OpError(f"mill:face failed during cut: {vex}")
 
-        elif name == "mill:profile":
-            # rectangular pocket cut on selected face
-            _require_params(params, ["rect_w", "rect_h", "depth"])
-            rect_w = _f(params.get("rect_w", 10), "rect_w")
-            rect_h = _f(params.get("rect_h", 10), "rect_h")
-            depth  = _f(params.get("depth", 1.0), "depth")
+    return build
 
-            if rect_w <= 0 or rect_h <= 0:
-                raise OpError("rect_w, rect_h must be positive")
-            if depth == 0:
-                raise OpError("depth must be non-zero")
 
-            wp = _must_single_planar_face(before, selector)
-            try:
-                cut_solid = wp.rect(rect_w, rect_h).extrude(-abs(depth))
-                after = before.cut(cut_solid)
-            except ValueError as vex:
-                raise OpError(f"mill:profile failed during cut: {vex}")
-            except Exception as ex:
-                raise OpError(f"mill:profile failed: {ex}")
-
-        elif name == "drill:hole":
-            # simple through/partial hole implemented as a negative cylinder
-            _require_params(params, ["dia", "depth"])
-            dia   = _f(params.get("dia", 5), "dia")
-            depth = _f(params.get("depth", 5), "depth")
-            x     = _f(params.get("x", 0), "x")
-            y     = _f(params.get("y", 0), "y")
-
-            if dia <= 0:
-                raise OpError("dia must be positive")
-            if depth == 0:
-                raise OpError("depth must be non-zero")
-
-            wp = _must_single_planar_face(before, selector)
-            try:
-                cut_solid = wp.center(x, y).circle(dia / 2.0).extrude(-abs(depth))
-                after = before.cut(cut_solid)
-            except ValueError as vex:
-                raise OpError(f"drill:hole failed during cut: {vex}")
-            except Exception as ex:
-                raise OpError(f"drill:hole failed: {ex}")
-
-        elif name == "mill:pocket_profile":
-            _require_params(params, ["profile_type", "depth"])
-            profile_type = params.get("profile_type", "rect")
-            if profile_type != "rect":
-                raise OpError("mill:pocket_profile: currently only profile_type='rect' is supported")
-
-            center = params.get("center", {}) or {}
-            size   = params.get("size", {}) or {}
-
-            cx = _f(center.get("x", 0), "center.x")
-            cy = _f(center.get("y", 0), "center.y")
-            sx = _f(size.get("x", 0), "size.x")
-            sy = _f(size.get("y", 0), "size.y")
-            depth = _f(params.get("depth", 0), "depth")
-            corner_radius = _f(params.get("corner_radius", 0), "corner_radius")
-
-            if sx <= 0 or sy <= 0:
-                raise OpError("mill:pocket_profile: size.x, size.y must be positive")
-            if depth == 0:
-                raise OpError("mill:pocket_profile: depth must be non-zero")
-            if corner_radius < 0:
-                raise OpError("mill:pocket_profile: corner_radius must be >= 0")
-
-            # 1) 加工面を 1 枚だけ選んで WP 取得
-            wp = _must_single_planar_face(before, selector)
+def _compile_mill_profile(params: Dict[str, Any], selector: str) -> CutterFn:
+    # rectangular pocket cut on selected face
+    _require_params(params, ["rect_w", "rect_h", "depth"])
+    rect_w = _f(params.get("rect_w", 10), "rect_w")
+    rect_h = _f(params.get("rect_h", 10), "rect_h")
+    depth  = _f(params.get("depth", 1.0), "depth")
 
-            try:
-                # 2) まずは角Rなしのベースポケットを作る
-                pocket = (
-                    wp.center(cx, cy)
-                      .rect(sx, sy)
-                      .extrude(-abs(depth))
-                )
-
-                # 3) corner_radius > 0 のときだけ 3D 側でフィレット
-                if corner_radius > 0:
-                    # ポケットの垂直エッジ（Z方向）をフィレット
-                    pocket = pocket.edges("|Z").fillet(corner_radius)
-
-                cut_solid = pocket
-                after = before.cut(cut_solid)
-
-            except ValueError as vex:
-                raise OpError(f"mill:pocket_profile failed during cut: {vex}")
-            except Exception as ex:
-                raise OpError(f"mill:pocket_profile failed: {ex}")
+    if rect_w <= 0 or rect_h <= 0:
+        raise OpError("rect_w, rect_h must be positive")
+    if depth == 0:
+        raise OpError("depth must be non-zero")
 
-        elif name == "mill:hole_pattern":
-            _require_params(params, ["pattern", "dia", "depth"])
-            pattern = params.get("pattern")
-            dia   = _f(params.get("dia", 5), "dia")
-            depth = _f(params.get("depth", 5), "depth")
+    def build(before: cq.Workplane) -> cq.Workplane:
+        wp = _must_single_planar_face(before, selector)
+        try:
+            return wp.newObject([_box_into_plane(wp.plane, 0.0, 0.0, rect_w, rect_h, depth)])
+        except ValueError as vex:
+            raise OpError(f"mill:profile failed during cut: {vex}")
 
-            if dia <= 0:
-                raise OpError("mill:hole_pattern: dia must be positive")
-            if depth == 0:
-                raise OpError("mill:hole_pattern: depth must be non-zero")
+    return build
 
-            if pattern != "line":
-                raise OpError("mill:hole_pattern: currently only pattern='line' is supported")
 
-            _require_params(params, ["count", "start", "end"])
-            count = int(_f(params.get("count", 0), "count"))
-            if count <= 0:
-                raise OpError("mill:hole_pattern: count must be positive")
+def _compile_drill_hole(params: Dict[str, Any], selector: str) -> CutterFn:
+    # simple through/partial hole implemented as a negative cylinder
+    _require_params(params, ["dia", "depth"])
+    dia   = _f(params.get("dia", 5), "dia")
+    depth = _f(params.get("depth", 5), "depth")
+    x     = _f(params.get("x", 0), "x")
+    y     = _f(params.get("y", 0), "y")
 
-            start = params.get("start", {}) or {}
-            end   = params.get("end", {}) or {}
-            sx = _f(start.get("x", 0), "start.x")
-            sy = _f(start.get("y", 0), "start.y")
-            ex_ = _f(end.get("x", 0), "end.x")
-            ey = _f(end.get("y", 0), "end.y")
+    if dia <= 0:
+        raise OpError("dia must be positive")
+    if depth == 0:
+        raise OpError("depth must be non-zero")
 
-            wp = _must_single_planar_face(before, selector)
+    def build(before: cq.Workplane) -> cq.Workplane:
+        wp = _must_single_planar_face(before, selector)
+        try:
+            return wp.newObject([_cylinder_into_plane(wp.plane, x, y, dia / 2.0, depth)])
+        except ValueError as vex:
+            raise OpError(f"drill:hole failed during cut: {vex}")
 
-            try:
-                cut_solid = None
-                for i in range(count):
-                    t = 0.0 if count == 1 else i / (count - 1)
-                    px = sx + (ex_ - sx) * t
-                    py = sy + (ey - sy) * t
-                    hole = wp.center(px, py).circle(dia / 2.0).extrude(-abs(depth))
-                    cut_solid = hole if cut_solid is None else cut_solid.union(hole)
-
-                after = before.cut(cut_solid)
-
-            except ValueError as vex:
-                raise OpError(f"mill:hole_pattern failed during cut: {vex}")
-            except Exception as ex:
-                raise OpError(f"mill:hole_pattern failed: {ex}")
+    return build
+
+
+def _compile_mill_pocket_profile(params: Dict[str, Any], selector: str) -> CutterFn:
+    _require_params(params, ["profile_type", "depth"])
+    profile_type = params.get("profile_type", "rect")
+    if profile_type != "rect":
+        raise OpError("mill:pocket_profile: currently only profile_type='rect' is supported")
+
+    center = params.get("center", {}) or {}
+    size   = params.get("size", {}) or {}
+
+    cx = _f(center.get("x", 0), "center.x")
+    cy = _f(center.get("y", 0), "center.y")
+    sx = _f(size.get("x", 0), "size.x")
+    sy = _f(size.get("y", 0), "size.y")
+    depth = _f(params.get("depth", 0), "depth")
+    corner_radius = _f(params.get("corner_radius", 0), "corner_radius")
+
+    if sx <= 0 or sy <= 0:
+        raise OpError("mill:pocket_profile: size.x, size.y must be positive")
+    if depth == 0:
+        raise OpError("mill:pocket_profile: depth must be non-zero")
+    if corner_radius < 0:
+        raise OpError("mill:pocket_profile: corner_radius must be >= 0")
+
+    def build(before: cq.Workplane) -> cq.Workplane:
+        # 1) 加工面を 1 枚だけ選んで WP 取得
+        wp = _must_single_planar_face(before, selector)
+
+        try:
+            # 2) まずは角Rなしのベースポケットを作る
+            pocket = (
+                wp.center(cx, cy)
+                  .rect(sx, sy)
+                  .extrude(-abs(depth))
+            )
+
+            # 3) corner_radius > 0 のときだけ 3D 側でフィレット
+            if corner_radius > 0:
+                # ポケットの垂直エッジ（Z方向）をフィレット
+                pocket = pocket.edges("|Z").fillet(corner_radius)
+
+            return pocket
 
-        elif name == "lathe:face_cut":
-            after = _op_lathe_face_cut(before, op)
+        except ValueError as vex:
+            raise OpError(f"mill:pocket_profile failed during cut: {vex}")
+        except Exception as ex:
+            raise OpError(f"mill:pocket_profile failed: {ex}")
+
+    return build
 
-        elif name == "lathe:turn_od":
-            after = _op_lathe_turn_od(before, op)
 
-        elif name == "lathe:bore_id":
-            after = _op_lathe_bore_id(before, op)
+def _compile_mill_hole_pattern(params: Dict[str, Any], selector: str) -> CutterFn:
+    _require_params(params, ["pattern", "dia", "depth"])
+    pattern = params.get("pattern")
+    dia   = _f(params.get("dia", 5), "dia")
+    depth = _f(params.get("depth", 5), "depth")
 
-        elif name == "lathe:turn_od_profile":
-            after = _op_lathe_turn_od_profile(before, op)
+    if dia <= 0:
+        raise OpError("mill:hole_pattern: dia must be positive")
+    if depth == 0:
+        raise OpError("mill:hole_pattern: depth must be non-zero")
 
-        elif name == "lathe:bore_id_profile":
-            after = _op_lathe_bore_id_profile(before, op)
+    if pattern != "line":
+        raise OpError("mill:hole_pattern: currently only pattern='line' is supported")
 
+    _require_params(params, ["count", "start", "end"])
+    count = int(_f(params.get("count", 0), "count"))
+    if count <= 0:
+        raise OpError("mill:hole_pattern: count must be positive")
 
-        elif name == "setup:index":
-            # Geometry は変えない（beforeそのまま）。
-            # CSYS 切り替えやログ出力は pipeline 側の責務とする。
-            after = before
+    start = params.get("start", {}) or {}
+    end   = params.get("end", {}) or {}
+    sx = _f(start.get("x", 0), "start.x")
+    sy = _f(start.get("y", 0), "start.y")
+    ex_ = _f(end.get("x", 0), "end.x")
+    ey = _f(end.get("y", 0), "end.y")
 
-        elif name == "xform:transform":
-            dx = _f(params.get("dx", 0), "dx")
-            dy = _f(params.get("dy", 0), "dy")
-            dz = _f(params.get("dz", 0), "dz")
-            after = before.translate((dx, dy, dz))
+    # 穴位置は params だけで決まるので先に並べておく
+    points: List[Tuple[float, float]] = []
+    for i in range(count):
+        t = 0.0 if count == 1 else i / (count - 1)
+        points.append((sx + (ex_ - sx) * t, sy + (ey - sy) * t))
 
-        else:
-            raise ValueError(f"unsupported op: {name}")
+    def build(before: cq.Workplane) -> cq.Workplane:
+        wp = _must_single_planar_face(before, selector)
 
-        # removed = before - after
         try:
-            removed = before.cut(after)
-        except Exception:
-            # In rare degenerate cases cut may fail; degrade gracefully with empty removal
-            removed = before
+            cut_solid = None
+            for px, py in points:
+                hole = wp.center(px, py).circle(dia / 2.0).extrude(-abs(depth))
+                cut_solid = hole if cut_solid is None else cut_solid.union(hole)
+            return cut_solid
+
+        except ValueError as vex:
+            raise OpError(f"mill:hole_pattern failed during cut: {vex}")
+        except Exception as ex:
+            raise OpError(f"mill:hole_pattern failed: {ex}")
+
+    return build
+
+
+_CUTTER_COMPILERS: Dict[str, Callable[[Dict[str, Any], str], CutterFn]] = {
+    "mill:face": _compile_mill_face,
+    "mill:profile": _compile_mill_profile,
+    "drill:hole": _compile_drill_hole,
+    "mill:pocket_profile": _compile_mill_pocket_profile,
+    "mill:hole_pattern": _compile_mill_hole_pattern,
+}
 
-        return after, removed
 
+def _freeze(v: Any) -> Any:
+    """params をハッシュ可能な形（入れ子の tuple）に変換する。"""
+    if isinstance(v, dict):
+        return tuple(sorted((k, _freeze(x)) for k, x in v.items()))
+    if isinstance(v, (list, tuple)):
+        return tuple(_freeze(x) for x in v)
+    return v
+
+
+# (op, selector, params) → コンパイル済みビルダ。
+# 同じ穴・同じポケットの記述が何度出てきても検証・数値変換は 1 回で済ませ、同じビルダを共有する。
+_COMPILED_CUTTERS: Dict[Any, CutterFn] = {}
+_COMPILED_CUTTERS_MAX = 256
+
+
+def _compile_cutter(op: Operation) -> Optional[CutterFn]:
+    """工具形状を持つ op なら検証済みのビルダを返す（それ以外は None）。"""
+    compiler = _CUTTER_COMPILERS.get(op.op)
+    if compiler is None:
+        return None
+
+    # 同じ Operation を 2 回目以降に流すときは、params の凍結・キー計算もしない
+    build = getattr(op, "_cutter", None)
+    if build is not None:
+        return build
+    build = _compile_cutter_uncached(op, compiler)
+    try:
+        op._cutter = build
+    except (AttributeError, ValueError):
+        # Operation 以外（テスト用の簡易オブジェクトなど）はキャッシュしない
+        pass
+    return build
+
+
+def _compile_cutter_uncached(
+    op: Operation, compiler: Callable[[Dict[str, Any], str], CutterFn]
+) -> CutterFn:
+    params = op.params or {}
+    selector = op.selector or ">Z"
+    try:
+        key = (op.op, selector, _freeze(params))
+        hash(key)
+    except TypeError:
+        return compiler(params, selector)
+
+    build = _COMPILED_CUTTERS.get(key)
+    if build is None:
+        build = compiler(params, selector)
+        if len(_COMPILED_CUTTERS) >= _COMPILED_CUTTERS_MAX:
+            _COMPILED_CUTTERS.clear()
+        _COMPILED_CUTTERS[key] = build
+    return build
+
+
+def _bop_cut(
+    base: cq.Shape, tools: List[cq.Shape], *, fill_history: bool = True
+) -> Optional[cq.Shape]:
+    """
+    base から tools を引く BRepAlgoAPI_Cut（OCCT の並列モード有効）。
+    失敗時は None を返す。
+    """
+    args = TopTools_ListOfShape()
+    args.Append(base.wrapped)
+    tool_list = TopTools_ListOfShape()
+    for t in tools:
+        tool_list.Append(t.wrapped)
+
+    bop = BRepAlgoAPI_Cut()
+    bop.SetArguments(args)
+    bop.SetTools(tool_list)
+    bop.SetRunParallel(True)
+    bop.SetToFillHistory(fill_history)
+    bop.Build()
+    if not bop.IsDone():
+        return None
+    return cq.Shape.cast(bop.Shape()).clean()
+
+
+def _cut_with(before: cq.Workplane, tool: cq.Workplane, name: str) -> cq.Workplane:
+    """
+    before から tool を引く（BRepAlgoAPI_Cut 1 回）。
+    tool が複数の shape（穴パターンなど）を持つ場合も Compound にまとめず、個別の tool 引数として渡す
+    （重なった工具同士の干渉も BOP 側で解決させるため）。
+    """
+    shapes = [s for s in tool.vals() if isinstance(s, cq.Shape)]
+    try:
+        result = _bop_cut(before.val(), shapes)
+    except ValueError as vex:
+        raise OpError(f"{name} failed during cut: {vex}")
+    except Exception as ex:
+        raise OpError(f"{name} failed: {ex}")
+    if result is None:
+        raise OpError(f"{name} failed during cut: boolean operation failed")
+    return before.newObject([result])
+
+
+def _as_single_shape(wp: cq.Workplane) -> cq.Shape:
+    shapes = [s for s in wp.vals() if isinstance(s, cq.Shape)]
+    if len(shapes) == 1:
+        return shapes[0]
+    return cq.Compound.makeCompound(shapes)
+
+
+def _cut_and_common(
+    before: cq.Workplane, cut_solid: cq.Workplane, name: str
+) -> Tuple[cq.Workplane, cq.Workplane]:
+    """
+    after = before - cut_solid, removed = before ∩ cut_solid を
+    1 つの BOPAlgo_PaveFiller（交差計算）を共有して求める。
+
+    before - after を別途計算するより交差計算が 1 回少なく、
+    removed も「実際に削り取られた体積」そのものになる。
+    """
+    base = before.val()
+    tool = _as_single_shape(cut_solid)
+
+    args = TopTools_ListOfShape()
+    args.Append(base.wrapped)
+    args.Append(tool.wrapped)
+
+    filler = BOPAlgo_PaveFiller()
+    filler.SetArguments(args)
+    filler.SetRunParallel(True)
+    filler.Perform()
+    if filler.HasErrors():
+        raise OpError(f"{name} failed during cut: intersection of stock and tool failed")
+
+    cut_op = BRepAlgoAPI_Cut(base.wrapped, tool.wrapped, filler)
+    common_op = BRepAlgoAPI_Common(base.wrapped, tool.wrapped, filler)
+    if not cut_op.IsDone() or not common_op.IsDone():
+        raise OpError(f"{name} failed during cut: boolean operation failed")
+
+    after = before.newObject([cq.Shape.cast(cut_op.Shape()).clean()])
+    removed = before.newObject([cq.Shape.cast(common_op.Shape()).clean()])
+    return after, removed
+
+
+# =========================
+# operation appliers
+# =========================
+
+def _apply_op_after(before: cq.Workplane, op: Operation) -> cq.Workplane:
+    """
+    工具形状を持たない op を 1 つ適用して after だけを返す（removed は呼び出し側で計算）。
+    mill/drill 系と _LATHE_CUTTERS の op は compile_op が工具形状から直接処理する。
+    """
+    name = op.op
+    params = op.params or {}
+
+    if name == "lathe:turn_od_profile":
+        return _op_lathe_turn_od_profile(before, op)
+
+    if name == "setup:index":
+        # Geometry は変えない（beforeそのまま）。
+        # CSYS 切り替えやログ出力は pipeline 側の責務とする。
+        return before
+
+    if name == "xform:transform":
+        dx = _f(params.get("dx", 0), "dx")
+        dy = _f(params.get("dy", 0), "dy")
+        dz = _f(params.get("dz", 0), "dz")
+        return before.translate((dx, dy, dz))
+
+    raise ValueError(f"unsupported op: {name}")
+
+
+def _removed_between(before: cq.Workplane, after: cq.Workplane) -> cq.Workplane:
+    # removed = before - after
+    # removed は出力専用で後段の selector には使わないので、BOP の history は取らない
+    try:
+        removed = _bop_cut(before.val(), [_as_single_shape(after)], fill_history=False)
+    except Exception:
+        removed = None
+    if removed is None:
+        # In rare degenerate cases cut may fail; degrade gracefully with empty removal
+        return before
+    return before.newObject([removed])
+
+
+def compile_op(
+    op: Operation, *, with_removed: bool = True
+) -> Callable[[cq.Workplane], Tuple[cq.Workplane, Optional[cq.Workplane]]]:
+    """
+    op を「before → (after, removed)」の関数に前処理する。
+
+    工具形状を持つ op（mill/drill 系）は params の検証・数値変換をここで済ませ、
+    返す関数は面選択・工具生成・Boolean だけを行う。
+    同じ op 列を何度も流すときは先に compile_op しておけば、
+    dict 参照や文字列分岐を毎回やり直さなくて済む。
+    params が不正ならこの時点で OpError を送出する。
+
+    with_removed=False のときは removed を計算せず None を返す
+    （最終形状だけが欲しい呼び出し側で、removed 用の Boolean を省くため）。
+    材料を削らない setup:index / xform:transform の removed も None。
+    """
+    name = op.op
+    try:
+        build_cutter = _compile_cutter(op)
     except OpError:
         raise
-    except ValueError:
-        # bubble up unsupported errors
-        raise
     except Exception as ex:
-        # normalize unexpected exceptions into OpError for clarity
         raise OpError(f"{name} failed: {ex}") from ex
 
+    def run(before: cq.Workplane) -> Tuple[cq.Workplane, Optional[cq.Workplane]]:
+        if before is None:
+            raise OpError("No stock solid. First operation must build stock")
+
+        try:
+            if build_cutter is not None:
+                if not with_removed:
+                    return _cut_with(before, build_cutter(before), name), None
+                # 工具形状が明示的にあるので、after/removed を交差計算 1 回で求める
+                return _cut_and_common(before, build_cutter(before), name)
+
+            lathe_cutter = _LATHE_CUTTERS.get(name)
+            if lathe_cutter is not None:
+                if not with_removed:
+                    return _cut_with(before, lathe_cutter(before, op), name), None
+                return _cut_and_common(before, lathe_cutter(before, op), name)
+
+            after = _apply_op_after(before, op)
+            if not with_removed or name in ("setup:index", "xform:transform"):
+                # setup:index / xform:transform は材料を削らない（位置が変わるだけ）
+                return after, None
+
+            # turn_od_profile は intersect なので工具形状がなく、差分を取るしかない
+            return after, _removed_between(before, after)
+
+        except OpError:
+            raise
+        except ValueError:
+            # bubble up unsupported errors
+            raise
+        except Exception as ex:
+            # normalize unexpected exceptions into OpError for clarity
+            raise OpError(f"{name} failed: {ex}") from ex
+
+    return run
+
+
+def apply_op(
+    before: cq.Workplane, op: Operation, *, with_removed: bool = True
+) -> Tuple[cq.Workplane, Optional[cq.Workplane]]:
+    """
+    Returns (after, removed)
+      solid  = after
+      removed= before ∩ cut_solid（工具形状のある op）
+               before - after（lathe:turn_od_profile）
+               None（setup:index / xform:transform、または with_removed=False）
+    """
+    if before is None:
+        raise OpError("No stock solid. First operation must build stock")
+
+    return compile_op(op, with_removed=with_removed)(before)
+
+
+def _tools_disjoint(shapes: List[cq.Shape]) -> bool:
+    """工具同士の BoundingBox が 1 組も重ならなければ True（1 つの Compound にまとめてよい）。"""
+    boxes = [s.BoundingBox() for s in shapes]
+    for i, a in enumerate(boxes):
+        for b in boxes[i + 1:]:
+            if (
+                a.xmin < b.xmax and b.xmin < a.xmax
+                and a.ymin < b.ymax and b.ymin < a.ymax
+                and a.zmin < b.zmax and b.zmin < a.zmax
+            ):
+                return False
+    return True
+
+
+def apply_drill_batch(
+    before: cq.Workplane, ops: Iterable[Operation], *, with_removed: bool = True
+) -> Tuple[cq.Workplane, Optional[cq.Workplane]]:
+    """
+    連続する drill:hole（穴パターンなど）をまとめて適用し、(after, removed) を返す。
+
+    穴の円柱はすべて before 上で作り、BoundingBox が互いに重ならなければ
+    1 つの Compound を工具にして after / removed を交差計算 1 回で求める。
+    重なる穴がある場合は、前の穴で加工面が変わりうるので apply_op を順に呼ぶ。
+    removed は各穴の before ∩ 工具 を集めたもの（with_removed=False なら None）。
+    """
+    if before is None:
+        raise OpError("No stock solid. First operation must build stock")
+
+    ops = list(ops)
+    for op in ops:
+        if op.op != "drill:hole":
+            raise OpError(f"apply_drill_batch only takes drill:hole ops, got {op.op}")
+    if not ops:
+        return before, (cq.Workplane("XY") if with_removed else None)
+
+    label = "drill:hole" if len(ops) == 1 else f"drill:hole x{len(ops)}"
+    try:
+        shapes = [
+            s for op in ops for s in _compile_cutter(op)(before).vals() if isinstance(s, cq.Shape)
+        ]
+        disjoint = _tools_disjoint(shapes)
+    except OpError:
+        raise
+    except Exception as ex:
+        raise OpError(f"{label} failed: {ex}") from ex
+
+    if disjoint:
+        tool = cq.Workplane("XY").add(shapes)
+        if not with_removed:
+            return _cut_with(before, tool, label), None
+        return _cut_and_common(before, tool, label)
+
+    work = before
+    pieces: List[cq.Shape] = []
+    for op in ops:
+        work, removed = apply_op(work, op, with_removed=with_removed)
+        if removed is not None:
+            pieces.extend(s for s in removed.vals() if isinstance(s, cq.Shape))
+    return work, (cq.Workplane("XY").add(pieces) if with_removed else None)
+
+
 # 旧版: faces(selector)→val()→workplane() を安全化
 def _wp_on_single_face(work: cq.Workplane, selector: str | None):
     # Backward-compatible alias kept for callers; delegates to safer impl
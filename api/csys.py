@@ -1,6 +1,8 @@
 # api/csys.py
 from __future__ import annotations
+from copy import copy
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Any, Tuple
 import cadquery as cq
 
@@ -17,27 +19,26 @@ def build_csys_index(csys_list: list[dict[str, Any]]) -> Dict[str, CsysDef]:
     """
     CaseN.json の csys_list から CsysDef の辞書を作る。
     """
-    index: Dict[str, CsysDef] = {}
-    for cs in csys_list:
-        name = cs["name"]
-        origin = cs.get("origin", {})
-        rpy = cs.get("rpy_deg", {})
-
-        index[name] = CsysDef(
-            name=name,
-            role=cs.get("role", "local"),
-            origin=(
-                float(origin.get("x", 0.0)),
-                float(origin.get("y", 0.0)),
-                float(origin.get("z", 0.0)),
-            ),
-            rpy_deg=(
-                float(rpy.get("r", 0.0)),
-                float(rpy.get("p", 0.0)),
-                float(rpy.get("y", 0.0)),
-            ),
-        )
-    return index
+    return {cs["name"]: _csys_def(cs) for cs in csys_list}
+
+
+def _csys_def(cs: dict[str, Any]) -> CsysDef:
+    origin = cs.get("origin") or {}
+    rpy = cs.get("rpy_deg") or {}
+    return CsysDef(
+        name=cs["name"],
+        role=cs.get("role", "local"),
+        origin=(
+            float(origin.get("x", 0.0)),
+            float(origin.get("y", 0.0)),
+            float(origin.get("z", 0.0)),
+        ),
+        rpy_deg=(
+            float(rpy.get("r", 0.0)),
+            float(rpy.get("p", 0.0)),
+            float(rpy.get("y", 0.0)),
+        ),
+    )
 
 
 def workplane_from_csys(csys: CsysDef, base_plane: str = "XY") -> cq.Workplane:
@@ -47,6 +48,18 @@ def workplane_from_csys(csys: CsysDef, base_plane: str = "XY") -> cq.Workplane:
 
     rpy_deg は「world に対するローカル座標系」の回転として扱う。
     """
+    plane = _plane_from_csys(csys, base_plane)
+    # キャッシュした Plane を Workplane 間で共有しないようコピーを渡す
+    # （.transformed() と同じく、原点を 1 つだけ持つ Workplane を返す）
+    return cq.Workplane(copy(plane)).newObject([plane.origin])
+
+
+@lru_cache(maxsize=128)
+def _plane_from_csys(csys: CsysDef, base_plane: str) -> cq.Plane:
+    """
+    rpy → 回転行列・原点オフセットの計算は (csys, base_plane) ごとに 1 回だけ行う。
+    CsysDef は frozen dataclass なのでそのままキーにできる。
+    """
     ox, oy, oz = csys.origin
     r, p, y = csys.rpy_deg
 
@@ -57,4 +70,4 @@ def workplane_from_csys(csys: CsysDef, base_plane: str = "XY") -> cq.Workplane:
             offset=(ox, oy, oz),
         )
     )
-    return wp
+    return wp.plane
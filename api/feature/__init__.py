@@ -1,7 +1,10 @@
 # api/feature/__init__.py
 from .turn_od_profile import apply_turn_od_profile_geometry, FeatureError
+from .dispatch import apply_feature, get_apply_fn
 
 __all__ = [
     "apply_turn_od_profile_geometry",
     "FeatureError",
+    "apply_feature",
+    "get_apply_fn",
 ]
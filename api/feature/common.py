@@ -1,22 +1,89 @@
 # api/feature/common.py
 from __future__ import annotations
-from typing import Tuple, Type
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
 class AxisError(RuntimeError):
     """Axis string could not be mapped to a unit vector."""
 
 
+_AXIS_MAP = {
+    "+X": (1.0, 0.0, 0.0),
+    "-X": (-1.0, 0.0, 0.0),
+    "+Y": (0.0, 1.0, 0.0),
+    "-Y": (0.0, -1.0, 0.0),
+    "+Z": (0.0, 0.0, 1.0),
+    "-Z": (0.0, 0.0, -1.0),
+}
+
+
 def axis_to_vector(axis: str, *, error_cls: Type[Exception] = AxisError) -> Tuple[float, float, float]:
     """Map "+Z", "-X", etc. to a unit vector; raise error_cls on unknown."""
-    a = axis.strip().upper()
-    mapping = {
-        "+X": (1.0, 0.0, 0.0),
-        "-X": (-1.0, 0.0, 0.0),
-        "+Y": (0.0, 1.0, 0.0),
-        "-Y": (0.0, -1.0, 0.0),
-        "+Z": (0.0, 0.0, 1.0),
-        "-Z": (0.0, 0.0, -1.0),
-    }
-    if a not in mapping:
+    # fast path: already normalized ("+Z" etc.) → no strip/upper allocation
+    v = _AXIS_MAP.get(axis)
+    if v is None:
+        v = _AXIS_MAP.get(axis.strip().upper())
+    if v is None:
         raise error_cls(f"Unsupported axis: {axis}")
-    return mapping[a]
+    return v
+
+
+# CSYS ローカルの ±Z だけを許す feature（planar_face / pocket / hole）用。
+# 値は depth に掛ける符号（"+Z" は表側へ、"-Z" は中へ）。
+_Z_SIGN = {
+    "+Z": 1.0,
+    "-Z": -1.0,
+}
+
+
+def z_axis_sign(axis: Any, *, error_cls: Type[Exception], message: str) -> float:
+    """Map "+Z"/"-Z" to +1.0/-1.0; raise error_cls(message) on anything else."""
+    # list / dict など hash できない値でも TypeError ではなく error_cls にする
+    if not isinstance(axis, str):
+        raise error_cls(message)
+    sign = _Z_SIGN.get(axis)
+    if sign is None:
+        sign = _Z_SIGN.get(axis.strip().upper())
+    if sign is None:
+        raise error_cls(message)
+    return sign
+
+
+# (name, default, rule, message)
+#   rule: None（数値化のみ） / "positive"（> 0 でなければ error_cls(message)）
+ParamSpec = Tuple[Tuple[str, float, Optional[str], Optional[str]], ...]
+
+
+def make_param_parser(
+    spec: ParamSpec,
+    *,
+    prefix: str,
+    error_cls: Type[Exception],
+) -> Callable[[Dict[str, Any]], Tuple[float, ...]]:
+    """
+    spec 専用の params パーサを作る（feature モジュールの import 時に 1 回だけ）。
+
+    返すパーサは spec 順の float タプルを返す。
+    名前・既定値・検証の有無は先に展開しておくので、呼び出しごとには
+    dict 参照・float 化・> 0 判定だけが走る。
+    """
+    fields = tuple(
+        (name, default, rule == "positive", message, f"{prefix}.{name} must be numeric, got ")
+        for name, default, rule, message in spec
+    )
+
+    def parse(params: Dict[str, Any]) -> Tuple[float, ...]:
+        get = params.get
+        out = []
+        append = out.append
+        for name, default, positive, message, numeric_msg in fields:
+            raw = get(name, default)
+            try:
+                v = float(raw)
+            except (TypeError, ValueError):
+                raise error_cls(numeric_msg + repr(raw))
+            if positive and not v > 0.0:
+                raise error_cls(message)
+            append(v)
+        return tuple(out)
+
+    return parse
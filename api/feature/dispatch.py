@@ -0,0 +1,55 @@
+# api/feature/dispatch.py
+from __future__ import annotations
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+if TYPE_CHECKING:
+    import cadquery as cq
+
+from ..csys import CsysDef
+from ..geometry.volume_3d import GeometryDelta
+from .turn_od_profile import FeatureError
+
+
+ApplyFn = Callable[["cq.Workplane", Dict[str, Any], Dict[str, CsysDef]], GeometryDelta]
+
+# feature_type → (モジュール名, 関数名)。モジュールは初回使用時に import する
+_FEATURE_MODULES: Dict[str, tuple[str, str]] = {
+    "turn_od_profile": ("turn_od_profile", "apply_turn_od_profile_geometry"),
+    "planar_face": ("planar_face", "apply_planar_face_geometry"),
+    "pocket_rectangular": ("pocket_rectangular", "apply_pocket_rectangular_geometry"),
+    "simple_hole": ("simple_hole", "apply_simple_hole_geometry"),
+}
+
+# 解決済みの feature_type → apply 関数
+_DISPATCH: Dict[str, ApplyFn] = {}
+
+
+def get_apply_fn(feature_type: Any) -> ApplyFn:
+    """
+    feature_type に対応する apply_*_geometry を返す。
+    未対応の feature_type は FeatureError。
+    """
+    fn = _DISPATCH.get(feature_type)
+    if fn is not None:
+        return fn
+
+    entry = _FEATURE_MODULES.get(feature_type)
+    if entry is None:
+        raise FeatureError(f"Unsupported feature_type: {feature_type}")
+
+    module_name, fn_name = entry
+    fn = getattr(import_module(f".{module_name}", __package__), fn_name)
+    _DISPATCH[feature_type] = fn
+    return fn
+
+
+def apply_feature(
+    solid: cq.Workplane,
+    feature: Dict[str, Any],
+    csys_index: Dict[str, CsysDef],
+) -> GeometryDelta:
+    """
+    feature["feature_type"] に応じた apply 関数を 1 箇所から呼ぶ。
+    """
+    return get_apply_fn(feature.get("feature_type"))(solid, feature, csys_index)
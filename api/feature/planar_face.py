@@ -1,16 +1,27 @@
 # api/feature/planar_face.py
 from __future__ import annotations
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
-import cadquery as cq
+if TYPE_CHECKING:
+    import cadquery as cq
 
 from ..csys import CsysDef, workplane_from_csys
-from ..geometry.profile_2d import make_rect_profile_centered
-from ..geometry.volume_3d import extrude_profile_volume, GeometryDelta
+from .common import make_param_parser, z_axis_sign
+from .turn_od_profile import FeatureError as _FeatureError
+from ..geometry.volume_3d import rect_extrude_volume, GeometryDelta
 
 
-class FeatureError(RuntimeError):
-    """planar_face の解釈エラー"""
+class FeatureError(_FeatureError):
+    """planar_face の解釈エラー（パイプラインでは共通の FeatureError として扱われる）"""
+
+
+_PLANAR_SPEC = (
+    ("depth", 0.0, "positive", "planar_face.depth must be > 0"),
+    ("size_x", 0.0, "positive", "planar_face.size_x/size_y must be > 0"),
+    ("size_y", 0.0, "positive", "planar_face.size_x/size_y must be > 0"),
+)
+
+_parse_planar_params = make_param_parser(_PLANAR_SPEC, prefix="planar_face", error_cls=FeatureError)
 
 
 def apply_planar_face_geometry(
@@ -40,41 +51,28 @@ def apply_planar_face_geometry(
     if csys is None:
         raise FeatureError(f"Unknown csys_id: {csys_id}")
 
-    depth = float(params.get("depth", 0.0))
-    if depth <= 0.0:
-        raise FeatureError("planar_face.depth must be > 0")
-
-    size_x = float(params.get("size_x", 0.0))
-    size_y = float(params.get("size_y", 0.0))
-    if size_x <= 0.0 or size_y <= 0.0:
-        raise FeatureError("planar_face.size_x/size_y must be > 0")
+    depth, size_x, size_y = _parse_planar_params(params)
 
     # axis: CSYS ローカル。省略時は "-Z"（表側から中へ）
     axis = params.get("axis", "-Z")
-    if axis not in ("+Z", "-Z"):
-        raise FeatureError("planar_face.axis must be '+Z' or '-Z' in CSYS local coords")
-
     # depth の符号を axis で決定
-    signed_depth = depth if axis == "+Z" else -depth
+    signed_depth = depth * z_axis_sign(
+        axis,
+        error_cls=FeatureError,
+        message="planar_face.axis must be '+Z' or '-Z' in CSYS local coords",
+    )
 
     mode = params.get("mode", "cut")
 
     # csys の XY を面の平面として扱う（原点を矩形中心とみなす）
     wp = workplane_from_csys(csys, base_plane="XY")
 
-    # 2D プロファイル（矩形）を生成。planar_face は角Rなし。
-    prof = make_rect_profile_centered(
+    # 矩形（角Rなし）をローカル Z 方向に押し出して cut/add
+    return rect_extrude_volume(
+        solid=solid,
         wp=wp,
         width=size_x,
         length=size_y,
-        corner_radius=0.0,
-    )
-
-    # ローカル Z 方向に押し出して cut/add
-    delta = extrude_profile_volume(
-        solid=solid,
-        profile=prof,
         depth=signed_depth,
         mode=mode,
     )
-    return delta
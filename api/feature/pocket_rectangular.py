@@ -1,16 +1,30 @@
 # api/feature/pocket_rectangular.py
 from __future__ import annotations
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
-import cadquery as cq
+if TYPE_CHECKING:
+    import cadquery as cq
 
 from ..csys import CsysDef, workplane_from_csys
-from ..geometry.profile_2d import make_rect_profile_centered
-from ..geometry.volume_3d import extrude_profile_volume, GeometryDelta
+from .common import make_param_parser, z_axis_sign
+from .turn_od_profile import FeatureError as _FeatureError
+from ..geometry.volume_3d import rect_extrude_volume, GeometryDelta
 
 
-class FeatureError(RuntimeError):
-    """pocket_rectangular の解釈エラー"""
+class FeatureError(_FeatureError):
+    """pocket_rectangular の解釈エラー（パイプラインでは共通の FeatureError として扱われる）"""
+
+
+_POCKET_SPEC = (
+    ("width", 0.0, "positive", "pocket_rectangular.width/length must be > 0"),
+    ("length", 0.0, "positive", "pocket_rectangular.width/length must be > 0"),
+    ("depth", 0.0, "positive", "pocket_rectangular.depth must be > 0"),
+    ("corner_radius", 0.0, None, None),
+    ("origin_x", 0.0, None, None),
+    ("origin_y", 0.0, None, None),
+)
+
+_parse_pocket_params = make_param_parser(_POCKET_SPEC, prefix="pocket_rectangular", error_cls=FeatureError)
 
 
 def apply_pocket_rectangular_geometry(
@@ -35,44 +49,36 @@ def apply_pocket_rectangular_geometry(
     if csys is None:
         raise FeatureError(f"Unknown csys_id: {csys_id}")
 
-    width = float(params.get("width", 0.0))
-    length = float(params.get("length", 0.0))
-    if width <= 0.0 or length <= 0.0:
-        raise FeatureError("pocket_rectangular.width/length must be > 0")
+    width, length, depth, corner_radius, origin_x, origin_y = _parse_pocket_params(params)
 
-    depth = float(params.get("depth", 0.0))
-    if depth <= 0.0:
-        raise FeatureError("pocket_rectangular.depth must be > 0")
-
-    corner_radius = float(params.get("corner_radius", 0.0))
-    origin_x = float(params.get("origin_x", 0.0))
-    origin_y = float(params.get("origin_y", 0.0))
+    # 角R は短辺の半分まで（ちょうど半分なら両端が半円の長穴）
+    half_min = min(width, length) / 2.0
+    if corner_radius > half_min:
+        raise FeatureError(
+            f"pocket_rectangular.corner_radius ({corner_radius}) must be <= "
+            f"min(width, length) / 2 ({half_min})"
+        )
 
     axis = params.get("axis", "-Z")  # CSYS ローカル
-    if axis not in ("+Z", "-Z"):
-        raise FeatureError("pocket_rectangular.axis must be '+Z' or '-Z' in CSYS local coords")
-
     # depth の符号を axis で決定
-    signed_depth = depth if axis == "+Z" else -depth
+    signed_depth = depth * z_axis_sign(
+        axis,
+        error_cls=FeatureError,
+        message="pocket_rectangular.axis must be '+Z' or '-Z' in CSYS local coords",
+    )
 
     mode = params.get("mode", "cut")
 
     # csys の XY 平面上で、origin_x / origin_y をポケット中心に取る
     wp = workplane_from_csys(csys, base_plane="XY").center(origin_x, origin_y)
 
-    # 2D 矩形プロファイル（角R付き）を生成
-    prof = make_rect_profile_centered(
+    # 矩形（角R付き）をローカル Z 方向に押し出して cut/add
+    return rect_extrude_volume(
+        solid=solid,
         wp=wp,
         width=width,
         length=length,
-        corner_radius=corner_radius,
-    )
-
-    # ローカル Z 方向に押し出して cut/add
-    delta = extrude_profile_volume(
-        solid=solid,
-        profile=prof,
         depth=signed_depth,
         mode=mode,
+        corner_radius=corner_radius,
     )
-    return delta
@@ -1,15 +1,28 @@
 # api/feature/simple_hole.py
 from __future__ import annotations
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
-import cadquery as cq
+if TYPE_CHECKING:
+    import cadquery as cq
 
 from ..csys import CsysDef, workplane_from_csys
+from .common import make_param_parser, z_axis_sign
+from .turn_od_profile import FeatureError as _FeatureError
 from ..geometry.volume_3d import cylinder_volume_apply, GeometryDelta
 
 
-class FeatureError(RuntimeError):
-    """simple_hole の解釈エラー"""
+class FeatureError(_FeatureError):
+    """simple_hole の解釈エラー（パイプラインでは共通の FeatureError として扱われる）"""
+
+
+_HOLE_SPEC = (
+    ("diameter", 0.0, "positive", "simple_hole.diameter must be > 0"),
+    ("depth", 0.0, "positive", "simple_hole.depth must be > 0"),
+    ("origin_x", 0.0, None, None),
+    ("origin_y", 0.0, None, None),
+)
+
+_parse_hole_params = make_param_parser(_HOLE_SPEC, prefix="simple_hole", error_cls=FeatureError)
 
 
 def apply_simple_hole_geometry(
@@ -30,23 +43,15 @@ def apply_simple_hole_geometry(
     if csys is None:
         raise FeatureError(f"Unknown csys_id: {csys_id}")
 
-    diameter = float(params.get("diameter", 0.0))
-    if diameter <= 0.0:
-        raise FeatureError("simple_hole.diameter must be > 0")
-
-    depth = float(params.get("depth", 0.0))
-    if depth <= 0.0:
-        raise FeatureError("simple_hole.depth must be > 0")
-
-    origin_x = float(params.get("origin_x", 0.0))
-    origin_y = float(params.get("origin_y", 0.0))
+    diameter, depth, origin_x, origin_y = _parse_hole_params(params)
 
     axis = params.get("axis", "-Z")  # CSYS ローカル
-    if axis not in ("+Z", "-Z"):
-        raise FeatureError("simple_hole.axis must be '+Z' or '-Z' in CSYS local coords")
-
     # depth の符号を axis で決定
-    signed_depth = depth if axis == "+Z" else -depth
+    signed_depth = depth * z_axis_sign(
+        axis,
+        error_cls=FeatureError,
+        message="simple_hole.axis must be '+Z' or '-Z' in CSYS local coords",
+    )
 
     mode = params.get("mode", "cut")
 
@@ -1,18 +1,27 @@
 # api/feature/turn_od_profile.py
 from __future__ import annotations
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
-import cadquery as cq
+if TYPE_CHECKING:
+    import cadquery as cq
 
 from ..csys import CsysDef, workplane_from_csys
 from ..geometry.profile_2d import make_turn_od_profile_zd
 from ..geometry.volume_3d import revolve_profile_volume, GeometryDelta
+from .common import make_param_parser
 
 
 class FeatureError(RuntimeError):
     """Feature 解釈時のユーザー向けエラー"""
 
 
+_TURN_OD_SPEC = (
+    ("angle_deg", 360.0, None, None),
+)
+
+_parse_turn_od_params = make_param_parser(_TURN_OD_SPEC, prefix="turn_od_profile", error_cls=FeatureError)
+
+
 def apply_turn_od_profile_geometry(
     solid: cq.Workplane,
     feature: Dict[str, Any],
@@ -57,9 +66,13 @@ def apply_turn_od_profile_geometry(
     if not profile_pts:
         raise FeatureError("turn_od_profile.params.profile is required")
 
-    angle_deg = float(params.get("angle_deg", 360.0))
+    (angle_deg,) = _parse_turn_od_params(params)
     mode = params.get("mode", "cut")
 
+    # 回転角 0 なら体積は変わらない。Workplane / プロファイルを作る前に抜ける
+    if angle_deg == 0.0:
+        return GeometryDelta(solid=solid)
+
     # 1) CSYS から軸方向 Workplane を取得
     # ここでは「XZ 平面に Z 軸方向のプロファイル」を描く想定
     wp_axis = workplane_from_csys(csys, base_plane="XZ")
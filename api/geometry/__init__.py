@@ -1,9 +1,17 @@
 # api/geometry/__init__.py
-from .volume_3d import GeometryDelta, revolve_profile_volume
+from OCP.BOPAlgo import BOPAlgo_Options
+
+# OCCT の Boolean（BRepAlgoAPI_Cut / Fuse / Common）はデフォルトだと単一スレッド。
+# プロセス全体の既定値を並列モードにしておくと、cq.Workplane.cut/union などが
+# 内部で作る BOP もすべてこの設定を引き継ぐ。
+BOPAlgo_Options.SetParallelMode_s(True)
+
+from .volume_3d import GeometryDelta, revolve_profile_volume, rect_extrude_volume
 from .profile_2d import make_turn_od_profile_zd
 
 __all__ = [
     "GeometryDelta",
     "revolve_profile_volume",
+    "rect_extrude_volume",
     "make_turn_od_profile_zd",
 ]
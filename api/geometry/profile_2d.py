@@ -1,6 +1,8 @@
 # api/geometry/profile_2d.py
 from __future__ import annotations
+from functools import lru_cache
 from typing import List, Dict
+import numpy as np
 import cadquery as cq
 
 
@@ -20,19 +22,19 @@ def make_turn_od_profile_zd(
     if len(points_zd) < 2:
         raise ValueError("turn_od_profile requires at least 2 points")
 
-    path_points = []
-    for p in points_zd:
-        z = float(p["z"])
-        r = float(p["radius"])
-        path_points.append((r, z))  # X = radius, Z = axis direction
+    n = len(points_zd)
+    # (N+2, 2) 配列に (radius, z) を直接詰める。X = radius, Z = axis direction
+    pts = np.empty((n + 2, 2), dtype=np.float64)
+    pts[:n, 0] = np.fromiter((p["radius"] for p in points_zd), dtype=np.float64, count=n)
+    pts[:n, 1] = np.fromiter((p["z"] for p in points_zd), dtype=np.float64, count=n)
 
     # 回転軸（Z軸）との閉じた領域を作るため、軸上の点を追加
-    z_start = path_points[0][1]
-    z_end = path_points[-1][1]
-    
     # 閉じた形状を作る：プロファイル → 終点のZ軸上 → 始点のZ軸上 → 始点
-    closed_points = path_points + [(0, z_end), (0, z_start)]
-    
+    pts[n] = (0.0, pts[n - 1, 1])
+    pts[n + 1] = (0.0, pts[0, 1])
+
+    closed_points = [tuple(p) for p in pts.tolist()]
+
     prof = wp.polyline(closed_points).close()
 
     # ここで corner R, chamfer などを入れたい場合は、
@@ -48,7 +50,8 @@ def make_rect_profile_centered(
 ) -> cq.Workplane:
     """
     XY 平面上に中心原点の矩形プロファイルを作成。
-    corner_radius > 0 の場合は四隅をフィレット。
+    corner_radius > 0 の場合は四隅を角R の折れ線（1 か所 _ARC_SEGMENTS 分割の polygon）で近似する。
+    corner_radius == min(width, length) / 2 なら両端が半円の長穴（幅と長さが同じなら円）になる。
 
     wp は「原点がポケット中心」の CSYS に合わせておく前提。
     """
@@ -59,14 +62,58 @@ def make_rect_profile_centered(
     l = float(length)
     r = float(corner_radius)
 
-    prof = wp.rect(w, l)
+    if r > min(w, l) / 2.0:
+        raise ValueError("corner_radius must be <= min(width, length) / 2")
 
-    if r > 0.0:
-        # Corner fillet on a standalone profile requires creating a solid
-        # or a sketch context; calling vertices().fillet(r) here can fail
-        # with "Cannot find a solid on the stack" in some CadQuery versions.
-        # For now, we skip automatic fillet to keep profile creation robust.
-        # TODO: implement rounded-rectangle polyline if corner_radius > 0
-        pass
+    # 同じ寸法の矩形 wire は 1 回だけ作り、wp.rect() と同じく
+    # スタック上の各点（なければ原点）へ moved() で配置する
+    wire = _rect_wire(w, l, r)
+    return wp.eachpoint(lambda loc: wire.moved(loc), True)
 
-    return prof
+
+@lru_cache(maxsize=256)
+def _rect_wire(w: float, l: float, r: float) -> cq.Wire:
+    """
+    原点中心 w x l（角R r）の閉じた矩形 wire（ローカル XY）。
+    角R は円弧にせず、_rounded_rect_vertices の頂点列から作る polygon で近似する
+    （単独の 2D プロファイルには vertices().fillet() が使えないため）。
+    """
+    if r <= 0.0:
+        hx, hy = w / 2.0, l / 2.0
+        vertices = [(-hx, -hy), (hx, -hy), (hx, hy), (-hx, hy)]
+    else:
+        vertices = _rounded_rect_vertices(w, l, r, _ARC_SEGMENTS).tolist()
+    return cq.Wire.makePolygon([cq.Vector(x, y, 0.0) for x, y in vertices], close=True)
+
+
+# 角R 1 か所（90°）あたりの分割数
+_ARC_SEGMENTS = 16
+
+
+def _rounded_rect_vertices(w: float, l: float, r: float, n_arc: int) -> np.ndarray:
+    """
+    原点中心 w x l、角R r の矩形の頂点列 (最大 4*(n_arc+1), 2) を反時計回りで返す。
+    各角の円弧を n_arc 分割し、円弧の端点同士を直線辺でつなぐ。
+    r == min(w, l) / 2 のときは長さ 0 の直線辺ができるので、その重複頂点は落とす。
+    """
+    hx = w / 2.0 - r
+    hy = l / 2.0 - r
+    n = n_arc + 1
+
+    # 角ごとの円弧中心と開始角: (+,+) 0°, (-,+) 90°, (-,-) 180°, (+,-) 270°
+    t = np.linspace(0.0, np.pi / 2.0, n)
+    angles = (np.arange(4)[:, None] * (np.pi / 2.0) + t[None, :]).ravel()
+    cx = np.repeat(np.array([hx, -hx, -hx, hx]), n)
+    cy = np.repeat(np.array([hy, hy, -hy, -hy]), n)
+
+    pts = np.empty((4 * n, 2), dtype=np.float64)
+    pts[:, 0] = cx + r * np.cos(angles)
+    pts[:, 1] = cy + r * np.sin(angles)
+
+    # 直前（先頭は末尾）の頂点と同じ点を落とす
+    keep = np.any(np.abs(pts - np.roll(pts, 1, axis=0)) > _DUP_TOL, axis=1)
+    return pts[keep]
+
+
+# 重複頂点とみなす距離（mm）
+_DUP_TOL = 1e-9
@@ -1,13 +1,18 @@
 # api/geometry/volume_3d.py
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
 
-from typing import Optional, Literal, Tuple
-import math
+from typing import List, Optional, Literal, Tuple
 import cadquery as cq
 
+from .profile_2d import make_rect_profile_centered
 
-@dataclass
+# 深さゼロ判定の許容値
+_EPS = 1e-9
+
+
+@dataclass(slots=True, frozen=True)
 class GeometryDelta:
     """
     1ステップ分の幾何変化。
@@ -15,11 +20,70 @@ class GeometryDelta:
     - removed: 除去されたボリューム（cut の場合）
     - added  : 追加されたボリューム（add の場合）
     """
-    solid: cq.Workplane
+    solid: Optional[cq.Workplane]
     removed: Optional[cq.Workplane] = None
     added: Optional[cq.Workplane] = None
 
 
+def _cut_shapes(solid: cq.Workplane, vol: cq.Workplane) -> cq.Workplane:
+    """
+    solid - vol を Shape 同士の Boolean 1 回で求める。
+    Workplane.cut のスタック/親探索を通さず、結果だけを solid の Workplane に載せ直す。
+    """
+    return solid.newObject([solid.val().cut(*vol.vals()).clean()])
+
+
+def _fuse_shapes(solid: cq.Workplane, vol: cq.Workplane) -> cq.Workplane:
+    """solid + vol を Shape 同士の Boolean 1 回で求める（_cut_shapes と同じ方針）。"""
+    return solid.newObject([solid.val().fuse(*vol.vals()).clean()])
+
+
+def _apply_volume(
+    solid: Optional[cq.Workplane],
+    vol: cq.Workplane,
+    mode: str,
+) -> GeometryDelta:
+    """
+    vol を solid に cut/add する。
+    solid が None のときは Boolean を行わず、工具ボリュームだけを返す
+    （ProcessContext が複数の cut をまとめて batched_cut するため）。
+    """
+    if mode == "cut":
+        new_solid = None if solid is None else _cut_shapes(solid, vol)
+        return GeometryDelta(solid=new_solid, removed=vol)
+
+    if mode == "add":
+        new_solid = None if solid is None else _fuse_shapes(solid, vol)
+        return GeometryDelta(solid=new_solid, added=vol)
+
+    raise ValueError(f"Unsupported mode: {mode}")
+
+
+def batched_cut(solid: cq.Workplane, vols: List[cq.Workplane]) -> cq.Workplane:
+    """
+    solid から vols をまとめて引く（N-ary BRepAlgoAPI_Cut 1 回）。
+    交差計算・BoundingBox 構築を工具の数だけ繰り返さずに済む。
+    """
+    from OCP.BRepAlgoAPI import BRepAlgoAPI_Cut
+    from OCP.TopTools import TopTools_ListOfShape
+
+    args = TopTools_ListOfShape()
+    args.Append(solid.val().wrapped)
+    tools = TopTools_ListOfShape()
+    for vol in vols:
+        for shape in vol.vals():
+            tools.Append(shape.wrapped)
+
+    op = BRepAlgoAPI_Cut()
+    op.SetArguments(args)
+    op.SetTools(tools)
+    op.SetRunParallel(True)
+    op.Build()
+    if not op.IsDone():
+        raise ValueError("batched cut failed")
+    return solid.newObject([cq.Shape.cast(op.Shape()).clean()])
+
+
 def revolve_profile_volume(
     solid: cq.Workplane,
     profile: cq.Workplane,
@@ -39,16 +103,7 @@ def revolve_profile_volume(
 
     vol = profile.revolve(angle_deg)
 
-    if mode == "cut":
-        new_solid = solid.cut(vol)
-        return GeometryDelta(solid=new_solid, removed=vol)
-
-    elif mode == "add":
-        new_solid = solid.union(vol)
-        return GeometryDelta(solid=new_solid, added=vol)
-
-    else:
-        raise ValueError(f"Unsupported mode: {mode}")
+    return _apply_volume(solid, vol, mode)
 
 
 def extrude_profile_volume(
@@ -67,20 +122,76 @@ def extrude_profile_volume(
 
     CSYS の回転は Workplane 側にすべて押し込む前提。
     """
-    if math.isclose(depth, 0.0, abs_tol=1e-9):
+    if -_EPS < depth < _EPS:
         return GeometryDelta(solid=solid)
 
     vol = profile.extrude(depth)
 
-    if mode == "cut":
-        new_solid = solid.cut(vol)
-        return GeometryDelta(solid=new_solid, removed=vol)
+    return _apply_volume(solid, vol, mode)
 
-    if mode == "add":
-        new_solid = solid.union(vol)
-        return GeometryDelta(solid=new_solid, added=vol)
 
-    raise ValueError(f"Unsupported mode: {mode}")
+@lru_cache(maxsize=256)
+def _box_up(w: float, l: float, d: float) -> cq.Solid:
+    """ローカル原点中心 w x l の矩形を +Z に d 押し出したボックス。"""
+    return cq.Solid.makeBox(w, l, d, cq.Vector(-w / 2.0, -l / 2.0, 0.0))
+
+
+@lru_cache(maxsize=256)
+def _box_down(w: float, l: float, d: float) -> cq.Solid:
+    """ローカル原点中心 w x l の矩形を -Z に d 押し出したボックス。"""
+    return cq.Solid.makeBox(w, l, d, cq.Vector(-w / 2.0, -l / 2.0, -d))
+
+
+# 押し出し方向の符号 → ボックス生成
+_BOX_BY_SIGN = {1.0: _box_up, -1.0: _box_down}
+
+
+def rect_extrude_volume(
+    solid: cq.Workplane,
+    wp: cq.Workplane,
+    width: float,
+    length: float,
+    depth: float,
+    mode: Literal["cut", "add"] = "cut",
+    corner_radius: float = 0.0,
+) -> GeometryDelta:
+    """
+    wp 原点を中心とする矩形プロファイルをローカル Z 方向に押し出し、
+    solid に cut/add する（planar_face / pocket_rectangular 共通の経路）。
+
+    depth の符号・0 の扱いは extrude_profile_volume と同じ。
+    角R なしの場合は、押し出し方向ごとに作り置いたボックスを wp 上へ配置する。
+    """
+    if corner_radius <= 0.0:
+        if width <= 0.0 or length <= 0.0:
+            raise ValueError("width/length must be > 0")
+        if -_EPS < depth < _EPS:
+            return GeometryDelta(solid=solid)
+        build = _BOX_BY_SIGN[1.0 if depth > 0 else -1.0]
+        box = build(float(width), float(length), abs(float(depth)))
+        # キャッシュ上のボックスは共有せず、複製を各点へ配置する
+        vol = wp.eachpoint(lambda loc: box.copy().moved(loc), True)
+        return _apply_volume(solid, vol, mode)
+
+    prof = make_rect_profile_centered(
+        wp=wp,
+        width=width,
+        length=length,
+        corner_radius=corner_radius,
+    )
+    return extrude_profile_volume(
+        solid=solid,
+        profile=prof,
+        depth=depth,
+        mode=mode,
+    )
+
+
+@lru_cache(maxsize=256)
+def _local_cylinder(radius: float, depth: float) -> cq.Solid:
+    """ローカル原点の円を ±Z に |depth| 押し出した円柱（circle().extrude(depth) と同形）。"""
+    direction = cq.Vector(0, 0, 1 if depth > 0 else -1)
+    return cq.Solid.makeCylinder(radius, abs(depth), cq.Vector(0, 0, 0), direction)
 
 
 def cylinder_volume_apply(
@@ -102,19 +213,14 @@ def cylinder_volume_apply(
     """
     if diameter <= 0.0:
         raise ValueError("diameter must be > 0")
-    if math.isclose(depth, 0.0, abs_tol=1e-9):
+    if -_EPS < depth < _EPS:
         return GeometryDelta(solid=solid)
 
     radius = float(diameter) * 0.5
 
-    vol = wp.circle(radius).extrude(depth)
+    # 同じ径・深さの円柱は 1 回だけ作り、wp 上の各点へ複製を moved() で配置する
+    # （キャッシュ上の TShape を Boolean や removed に渡して共有しないため）
+    cyl = _local_cylinder(radius, float(depth))
+    vol = wp.eachpoint(lambda loc: cyl.copy().moved(loc), True)
 
-    if mode == "cut":
-        new_solid = solid.cut(vol)
-        return GeometryDelta(solid=new_solid, removed=vol)
-
-    if mode == "add":
-        new_solid = solid.union(vol)
-        return GeometryDelta(solid=new_solid, added=vol)
-
-    raise ValueError(f"Unsupported mode: {mode}")
+    return _apply_volume(solid, vol, mode)
@@ -1,13 +1,30 @@
 # api/llm_client.py
 from __future__ import annotations
 
+import asyncio
 import os
-import json
+import re
+import uuid
+import hashlib
 import logging
-from typing import Any, Dict, List
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 import httpx
+import orjson
+from aiolimiter import AsyncLimiter
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from fastapi import HTTPException
+from pydantic import ValidationError
+
+from .models import Operation, Stock
 
 logger = logging.getLogger("llm_client")
 
@@ -36,22 +53,374 @@ AZURE_OPENAI_FEATURE_DEPLOYMENT = os.getenv(
 )
 
 
+# prompt_cache_key を payload に付けるか（対応する api-version のときだけ有効にする）
+AZURE_OPENAI_PROMPT_CACHE_KEY = os.getenv("AZURE_OPENAI_PROMPT_CACHE_KEY", "0") == "1"
+
+
+# Azure 呼び出しの同時実行数と分間リクエスト数の上限（429 を出さないように手前で絞る）
+AZURE_MAX_CONCURRENCY = int(os.getenv("AZURE_MAX_CONCURRENCY", "8"))
+AZURE_RPM = int(os.getenv("AZURE_RPM", "600"))
+
+_AZURE_SEM = asyncio.Semaphore(AZURE_MAX_CONCURRENCY)
+_AZURE_LIMITER = AsyncLimiter(max_rate=AZURE_RPM, time_period=60)
+
+# バックオフして再試行するステータス
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# 再試行する例外（上のステータスは _stream_completion が HTTPStatusError にする）
+_RETRY_EXCEPTIONS = (httpx.HTTPStatusError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
 class LLMConfigError(RuntimeError):
     pass
 
 
+# ============================================
+# HTTP クライアント（接続プールをリクエスト間で共有）
+# ============================================
+
+_HTTP_CLIENT: httpx.AsyncClient | None = None
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """
+    共有 AsyncClient を返す（未作成・close 済みなら作り直す）。
+    毎回 TCP/TLS ハンドシェイクし直さないよう keep-alive 接続を再利用する。
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=60.0,
+            ),
+            http2=True,
+        )
+    return _HTTP_CLIENT
+
+
+async def open_http_client() -> None:
+    """アプリ起動時に共有クライアントを作っておく。"""
+    await _get_client()
+
+
+async def close_http_client() -> None:
+    """アプリ終了時に共有クライアントを閉じる。"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
+# ============================================
+# 完全一致プロンプトキャッシュ
+# ============================================
+
+_LLM_CACHE_MAX = 4096
+
+# ディスク側のキャッシュ置き場（既定は空文字 = 無効）。"{key[:2]}/{key}.json" に結果 JSON を置く
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+# ディスク側のエントリ数の上限（超えたら更新時刻の古いものから消す）
+LLM_CACHE_DISK_MAX = int(os.getenv("LLM_CACHE_DISK_MAX", "10000"))
+# 何回書いたらディレクトリを走査して上限を確認するか（毎回 glob しない）
+_DISK_PRUNE_EVERY = 64
+_LLM_CACHE: "OrderedDict[str, Mapping[str, Any]]" = OrderedDict()
+_disk_writes = 0
+
+
+def _cache_key(deployment: str, payload: bytes) -> str:
+    """(deployment, 送信 payload) の SHA-256。payload は固定 prefix + 発話で決定的。"""
+    h = hashlib.sha256(deployment.encode())
+    h.update(b"\0")
+    h.update(payload)
+    return h.hexdigest()
+
+
+async def _cache_get(key: str, is_valid: Callable[[Any], bool]) -> Mapping[str, Any] | None:
+    data = _LLM_CACHE.get(key)
+    if data is not None:
+        _LLM_CACHE.move_to_end(key)
+        return data
+
+    # メモリになければディスクを見る（プロセス再起動後・別ワーカーの結果も使う）
+    if not LLM_CACHE_DIR:
+        return None
+    raw = await asyncio.to_thread(_disk_read, key)
+    if raw is None:
+        return None
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        logger.warning("Ignoring corrupt LLM cache entry: %s", key)
+        return None
+    if not is_valid(data):
+        logger.warning("Ignoring invalid LLM cache entry: %s", key)
+        return None
+    return _memory_put(key, data)
+
+
+async def _cache_put(key: str, data: Dict[str, Any]) -> Mapping[str, Any]:
+    """
+    data をメモリ（読み取り専用ビュー）と、LLM_CACHE_DIR があればディスクにもキャッシュし、
+    ビューを返す（ヒット時もコピーせずに同じビューを返すため）。
+    """
+    if LLM_CACHE_DIR:
+        await asyncio.to_thread(_disk_write, key, orjson.dumps(data))
+    return _memory_put(key, data)
+
+
+async def _cache_put_valid(
+    key: str, data: Any, is_valid: Callable[[Any], bool]
+) -> Mapping[str, Any]:
+    """
+    is_valid を通った結果だけ _cache_put する。
+    通らない結果はそのまま返す（呼び出し側がエラーにする。再試行では LLM を呼び直す）。
+    """
+    if not is_valid(data):
+        logger.warning("Not caching LLM result that failed validation: %s", data)
+        return data
+    return await _cache_put(key, data)
+
+
+def _is_valid_stock_result(data: Any) -> bool:
+    """{"stock": {...}} の "stock" が Stock として読めるか。"""
+    try:
+        Stock(**data["stock"])
+    except (KeyError, TypeError, ValidationError):
+        return False
+    return True
+
+
+def _is_valid_feature_result(data: Any) -> bool:
+    """"op" / "params" を持ち、Operation として読めるか。"""
+    if not isinstance(data, dict) or "op" not in data or "params" not in data:
+        return False
+    try:
+        Operation(**data)
+    except (TypeError, ValidationError):
+        return False
+    return True
+
+
+def _memory_put(key: str, data: Dict[str, Any]) -> Mapping[str, Any]:
+    view = MappingProxyType(data)
+    # イベントループ上で await を挟まずに更新するのでロックは不要
+    _LLM_CACHE[key] = view
+    _LLM_CACHE.move_to_end(key)
+    while len(_LLM_CACHE) > _LLM_CACHE_MAX:
+        _LLM_CACHE.popitem(last=False)
+    return view
+
+
+def _disk_path(key: str) -> Path:
+    return Path(LLM_CACHE_DIR) / key[:2] / f"{key}.json"
+
+
+# 以下のディスク I/O はイベントループを止めないよう asyncio.to_thread から呼ぶ
+
+def _disk_read(key: str) -> bytes | None:
+    try:
+        return _disk_path(key).read_bytes()
+    except OSError:
+        return None
+
+
+def _disk_write(key: str, raw: bytes) -> None:
+    """一時ファイルに書いてから os.replace（書きかけのエントリを読ませない）。失敗しても応答は返す。"""
+    global _disk_writes
+    path = _disk_path(key)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(raw)
+        os.replace(tmp, path)
+    except OSError as ex:
+        logger.warning("Failed to write LLM cache entry %s: %s", key, ex)
+        return
+
+    _disk_writes += 1
+    if _disk_writes % _DISK_PRUNE_EVERY == 1:
+        _disk_prune()
+
+
+def _disk_prune() -> None:
+    """エントリ数が LLM_CACHE_DISK_MAX を超えていたら、更新時刻の古いものから消す。"""
+    entries = []
+    for entry in Path(LLM_CACHE_DIR).glob("*/*.json"):
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except OSError:
+            pass
+    excess = len(entries) - LLM_CACHE_DISK_MAX
+    if excess <= 0:
+        return
+    entries.sort()
+    for _, entry in entries[:excess]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def _disk_clear() -> int:
+    n = 0
+    for entry in Path(LLM_CACHE_DIR).glob("*/*.json"):
+        try:
+            entry.unlink()
+            n += 1
+        except OSError:
+            pass
+    return n
+
+
+async def clear_llm_cache() -> int:
+    """メモリとディスクのキャッシュを空にして、消したエントリ数を返す。"""
+    n = len(_LLM_CACHE)
+    _LLM_CACHE.clear()
+    if LLM_CACHE_DIR:
+        n += await asyncio.to_thread(_disk_clear)
+    return n
+
+
 # ============================================
 # Azure OpenAI 呼び出し
 # ============================================
 
+def _messages_prefix(fewshot: Tuple[Dict[str, Any], ...]) -> bytes:
+    """
+    {"messages":[...few-shot...]} を 1 回だけ dump し、末尾の "]}" を落とした bytes。
+    リクエストごとにはユーザー発話 1 件だけを dump して後ろにつなぐ。
+    """
+    return orjson.dumps({"messages": fewshot})[:-2]
+
+
+def _build_payload(
+    prefix: bytes,
+    user_text: str,
+    prompt_cache_key: str | None = None,
+) -> bytes:
+    """
+    固定 prefix にユーザー発話を byte 単位でつないで Chat Completions の body を作る。
+    prompt_cache_key は AZURE_OPENAI_PROMPT_CACHE_KEY=1 のときだけ付ける。
+    """
+    # Azure では body に model は不要（deployment 名でルーティング）
+    # stream=true で SSE の差分を受け取り、JSON が閉じた時点で読み終える
+    body = prefix + b"," + orjson.dumps({"role": "user", "content": user_text}) + b'],"stream":true'
+    if prompt_cache_key and AZURE_OPENAI_PROMPT_CACHE_KEY:
+        # 固定の few-shot 前置部分を同じキャッシュに載せる
+        body += b',"prompt_cache_key":' + orjson.dumps(prompt_cache_key)
+    return body + b"}"
+
+
+class _JsonEndScanner:
+    """
+    受信済みテキストを先頭から走査し、最初の JSON 値（{...} / [...]）が
+    閉じた位置を返す小さな状態機械。文字列リテラル内の括弧は数えない。
+    閉じた値が JSON として読めなければ skip() で次の候補から走査し直す。
+    """
+
+    __slots__ = ("start", "depth", "in_str", "escape", "pos", "error")
+
+    def __init__(self) -> None:
+        self.start = -1
+        self.depth = 0
+        self.in_str = False
+        self.escape = False
+        self.pos = 0
+        self.error: orjson.JSONDecodeError | None = None
+
+    def feed(self, buf: str) -> int:
+        """buf の未走査部分を進める。値が閉じたら終端 index（排他的）、まだなら -1。"""
+        i = self.pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if self.start < 0:
+                if c == "{" or c == "[":
+                    self.start = i
+                    self.depth = 1
+            elif self.in_str:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_str = False
+            elif c == '"':
+                self.in_str = True
+            elif c == "{" or c == "[":
+                self.depth += 1
+            elif c == "}" or c == "]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.pos = i + 1
+                    return i + 1
+            i += 1
+        self.pos = n
+        return -1
+
+    def skip(self) -> None:
+        """いまの候補を捨て、その開き括弧の次の文字から走査し直す（説明文中の [..] などを読み飛ばす）。"""
+        self.pos = self.start + 1
+        self.start = -1
+        self.depth = 0
+        self.in_str = False
+        self.escape = False
+
+    def next_json(self, buf: str) -> Tuple[str, Any] | None:
+        """
+        buf から orjson.loads できる最初の値を探し、(部分文字列, 読んだ値) を返す。
+        まだ見つからなければ None（読めなかった候補の例外は self.error に残す）。
+        続きを feed したいときは同じ scanner で再度呼ぶ（読めなかった候補は走査し直さない）。
+        """
+        while (end := self.feed(buf)) > 0:
+            candidate = buf[self.start:end]
+            try:
+                return candidate, orjson.loads(candidate)
+            except orjson.JSONDecodeError as ex:
+                self.error = ex
+                self.skip()
+        return None
+
+
+def _sse_delta_content(line: str) -> str | None:
+    """SSE の 1 行から delta.content を取り出す（対象外の行・壊れたイベントは None）。"""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        event = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        logger.debug("Skipping malformed SSE event: %r", data)
+        return None
+    # Azure は先頭に choices が空の prompt_filter_results イベントを送ってくる
+    choices = event.get("choices") or ()
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or {}
+    return delta.get("content")
+
+
 async def _call_chat_completion_azure(
     deployment: str,
-    messages: List[Dict[str, Any]],
+    payload: bytes,
 ) -> str:
     """
     Azure OpenAI Chat Completions を叩く薄いラッパー。
+    payload は _build_payload で組み立てた JSON body（bytes, stream=true）。
     返り値は assistant.message.content の文字列（JSON文字列想定）。
 
+    同時実行数（AZURE_MAX_CONCURRENCY）と分間リクエスト数（AZURE_RPM）で絞り、
+    429 / 5xx と読み取りタイムアウト・切断はジッタ付き指数バックオフで最大 3 回まで試す。
+
+    応答はストリーミングで受け取り、content 中の最初の JSON 値が閉じた時点で
+    残りを待たずにその部分を返す。閉じなかった場合は受信した content 全体を返す
+    （_parse_llm_json 側で切り出し・エラー処理する）。
+
     エンドポイント:
       {endpoint}/openai/deployments/{deployment}/chat/completions?api-version=...
     """
@@ -66,69 +435,137 @@ async def _call_chat_completion_azure(
         f"?api-version={AZURE_OPENAI_API_VERSION}"
     )
 
+    # 同じ payload には同じ request id（GUID 形式）を付け、再試行を Azure 側で突き合わせられるようにする
+    request_id = str(uuid.UUID(hex=hashlib.sha256(payload).hexdigest()[:32]))
+
     headers = {
         "api-key": AZURE_OPENAI_API_KEY,
         "Content-Type": "application/json",
+        "x-ms-client-request-id": request_id,
     }
 
-    payload = {
-        # Azure では body に model は不要（deployment 名でルーティング）
-        "messages": messages,
-    }
+    logger.debug("Calling Azure OpenAI: deployment=%s request_id=%s", deployment, request_id)
+
+    client = await _get_client()
+    try:
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_random_exponential(min=0.3, max=5),
+            retry=retry_if_exception_type(_RETRY_EXCEPTIONS),
+            before_sleep=_log_retry,
+            reraise=True,
+        ):
+            with attempt:
+                async with _AZURE_SEM, _AZURE_LIMITER:
+                    return await _stream_completion(client, url, headers, payload)
+    except httpx.HTTPStatusError as ex:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Azure OpenAI API error: {ex.response.status_code}",
+        ) from ex
+    except (httpx.ReadTimeout, httpx.RemoteProtocolError) as ex:
+        logger.error("Azure OpenAI connection error: %s", ex)
+        raise HTTPException(
+            status_code=500,
+            detail="Azure OpenAI connection error.",
+        ) from ex
+
+
+def _log_retry(retry_state) -> None:
+    """再試行するときだけ INFO で 1 行残す。"""
+    logger.info(
+        "Retrying Azure OpenAI call (attempt %d): %s",
+        retry_state.attempt_number,
+        retry_state.outcome.exception(),
+    )
 
-    logger.debug("Calling Azure OpenAI: deployment=%s", deployment)
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(url, headers=headers, json=payload)
+async def _stream_completion(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    payload: bytes,
+) -> str:
+    """
+    1 回分のストリーミング呼び出し。再試行対象のステータスは httpx.HTTPStatusError で返す。
+    """
+    async with client.stream("POST", url, headers=headers, content=payload) as resp:
         if resp.status_code >= 400:
+            body = await resp.aread()
             logger.error(
-                "Azure OpenAI API error %s: %s", resp.status_code, resp.text
+                "Azure OpenAI API error %s: %s", resp.status_code, body.decode(errors="replace")
             )
+            if resp.status_code in _RETRY_STATUS:
+                # 呼び出し側の AsyncRetrying で再試行させる
+                raise httpx.HTTPStatusError(
+                    f"Azure OpenAI API error: {resp.status_code}",
+                    request=resp.request,
+                    response=resp,
+                )
             raise HTTPException(
                 status_code=500,
                 detail=f"Azure OpenAI API error: {resp.status_code}",
             )
 
-        data = resp.json()
-        try:
-            content = data["choices"][0]["message"]["content"]
-        except Exception as ex:
-            logger.exception("Unexpected Azure OpenAI response: %s", data)
-            raise HTTPException(
-                status_code=500,
-                detail="Unexpected Azure OpenAI response format.",
-            ) from ex
+        content = ""
+        received = False
+        scanner = _JsonEndScanner()
+        async for line in resp.aiter_lines():
+            delta = _sse_delta_content(line)
+            if delta is None:
+                continue
+            received = True
+            content += delta
+            # 閉じた値が JSON として読めたときだけ打ち切る（説明文中の [..] では止まらない）
+            found = scanner.next_json(content)
+            if found is not None:
+                logger.debug("Azure OpenAI raw content: %s", content)
+                return found[0]
+
+    if not received:
+        logger.error("Unexpected Azure OpenAI response: no content in stream")
+        raise HTTPException(
+            status_code=500,
+            detail="Unexpected Azure OpenAI response format.",
+        )
 
-        logger.debug("Azure OpenAI raw content: %s", content)
-        return content
+    logger.debug("Azure OpenAI raw content: %s", content)
+    return content
 
 
-def _extract_json_text(text: str) -> str:
+def _parse_llm_json(content: str | None, extractor: str) -> Dict[str, Any]:
     """
-    Try to extract a JSON substring from LLM text output.
-
-    Strategy:
-    - strip surrounding whitespace
-    - if it already starts with '{' or '[' return it
-    - otherwise find the first '{' and the last '}' and return that slice
-    - raise ValueError if no JSON-like braces are found
+    LLM の content を JSON として読む。
+    - まず content 全体を orjson.loads
+    - 失敗したら _JsonEndScanner で {...} / [...] を先頭から切り出し、loads できた最初の値を使う
+      （```json フェンスや前後の説明文、読めない括弧、後ろに続く別の括弧は落とす）
+    どちらも失敗したら 502 の HTTPException（extractor はメッセージ用の "stock" / "feature"）。
     """
-    if text is None:
-        raise ValueError("No text to extract JSON from")
-
-    s = text.strip()
-    if not s:
-        raise ValueError("Empty string")
-
-    if s[0] in ("{", "["):
-        return s
-
-    first = s.find("{")
-    last = s.rfind("}")
-    if first == -1 or last == -1 or last < first:
-        raise ValueError("No JSON object found in text")
+    if content:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+
+    scanner = _JsonEndScanner()
+    found = scanner.next_json(content or "")
+    if found is not None:
+        return found[1]
+
+    logger.debug("LLM %s extractor raw content: %r", extractor, content)
+    error = scanner.error
+    if error is None:
+        logger.error("LLM %s extractor output has no JSON", extractor)
+        raise HTTPException(
+            status_code=502,
+            detail=f"LLM {extractor} extractor did not return valid JSON.",
+        )
 
-    return s[first : last + 1]
+    logger.error("Failed to parse extracted JSON from %s extractor: %s", extractor, error)
+    raise HTTPException(
+        status_code=502,
+        detail=f"LLM {extractor} extractor returned invalid JSON after extraction.",
+    ) from error
 
 
 # ---------------------------------------
@@ -142,7 +579,9 @@ _STOCK_SYSTEM_PROMPT = (
     "Do not add explanations or comments."
 )
 
-_STOCK_FEWSHOT_MESSAGES: List[Dict[str, Any]] = [
+# 固定部分（system + few-shot）を先頭に置き、ユーザー発話は常に末尾に 1 件だけ足す
+# （サーバー側の prefix キャッシュが効くように順序を変えないこと）
+_STOCK_FEWSHOT_MESSAGES: Tuple[Dict[str, Any], ...] = (
     {
         "role": "system",
         "content": _STOCK_SYSTEM_PROMPT,
@@ -166,14 +605,29 @@ _STOCK_FEWSHOT_MESSAGES: List[Dict[str, Any]] = [
             "}"
         ),
     },
-]
+)
+
+_STOCK_PREFIX_BYTES = _messages_prefix(_STOCK_FEWSHOT_MESSAGES)
 
 
 # ============================================
 # ダミー実装（素材）
 # ============================================
 
-def _dummy_stock(text: str) -> Dict[str, Any]:
+# 固定のダミー結果（読み取り専用。呼び出しごとに dict を作り直さない）
+_DUMMY_STOCK_RESULT: Mapping[str, Any] = MappingProxyType({
+    "stock": {
+        "type": "block",
+        "params": {
+            "w": 100.0,
+            "d": 60.0,
+            "h": 20.0,
+        },
+    }
+})
+
+
+def _dummy_stock(text: str) -> Mapping[str, Any]:
     """
     LLM なしで動かすための簡易ダミー。
     入力に関係なく、ある程度まともな block を返す。
@@ -182,19 +636,10 @@ def _dummy_stock(text: str) -> Dict[str, Any]:
 
     # すこしだけ真面目に数値を拾うこともできるが、
     # とりあえずは固定値で十分。
-    return {
-        "stock": {
-            "type": "block",
-            "params": {
-                "w": 100.0,
-                "d": 60.0,
-                "h": 20.0,
-            },
-        }
-    }
+    return _DUMMY_STOCK_RESULT
 
 
-async def call_stock_extractor(text: str, language: str | None = "ja") -> Dict[str, Any]:
+async def call_stock_extractor(text: str, language: str | None = "ja") -> Mapping[str, Any]:
     """
     素材命令（自然言語） → {\"stock\": {...}} を返す。
 
@@ -211,42 +656,27 @@ async def call_stock_extractor(text: str, language: str | None = "ja") -> Dict[s
     if NL_DUMMY_MODE or not AZURE_OPENAI_ENDPOINT or not AZURE_OPENAI_API_KEY:
         return _dummy_stock(text)
 
-    messages = list(_STOCK_FEWSHOT_MESSAGES) + [
-        {"role": "user", "content": text}
-    ]
+    payload = _build_payload(_STOCK_PREFIX_BYTES, text, prompt_cache_key="stock_v1")
+
+    key = _cache_key(AZURE_OPENAI_STOCK_DEPLOYMENT, payload)
+    cached = await _cache_get(key, _is_valid_stock_result)
+    if cached is not None:
+        return cached
 
     try:
         content = await _call_chat_completion_azure(
             AZURE_OPENAI_STOCK_DEPLOYMENT,
-            messages,
+            payload,
         )
     except LLMConfigError as e:
         logger.error("LLM config error in call_stock_extractor: %s", e)
         # 設定エラー時もダミーにフォールバックする
         return _dummy_stock(text)
 
-    # content は JSON 文字列を想定
-    # First try direct parse; if it fails, attempt to extract JSON substring
-    try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        try:
-            json_text = _extract_json_text(content)
-            data = json.loads(json_text)
-        except ValueError as ex:
-            logger.exception("Failed to extract JSON from stock extractor output: %s", content)
-            raise HTTPException(
-                status_code=502,
-                detail="LLM stock extractor did not return valid JSON.",
-            ) from ex
-        except json.JSONDecodeError as ex:
-            logger.exception("Failed to parse extracted JSON from stock extractor: %s", json_text)
-            raise HTTPException(
-                status_code=502,
-                detail="LLM stock extractor returned invalid JSON after extraction.",
-            ) from ex
+    # content は JSON 文字列を想定（前後に説明文やフェンスがあれば切り出す）
+    data = _parse_llm_json(content, "stock")
 
-    return data
+    return await _cache_put_valid(key, data, _is_valid_stock_result)
 
 
 # ---------------------------------------
@@ -261,7 +691,9 @@ _FEATURE_SYSTEM_PROMPT = (
     "Do not add explanations or comments."
 )
 
-_FEATURE_FEWSHOT_MESSAGES: List[Dict[str, Any]] = [
+# 固定部分（system + few-shot）を先頭に置き、ユーザー発話は常に末尾に 1 件だけ足す
+# （サーバー側の prefix キャッシュが効くように順序を変えないこと）
+_FEATURE_FEWSHOT_MESSAGES: Tuple[Dict[str, Any], ...] = (
     {
         "role": "system",
         "content": _FEATURE_SYSTEM_PROMPT,
@@ -325,70 +757,81 @@ _FEATURE_FEWSHOT_MESSAGES: List[Dict[str, Any]] = [
             "}"
         ),
     },
-]
+)
+
+_FEATURE_PREFIX_BYTES = _messages_prefix(_FEATURE_FEWSHOT_MESSAGES)
 
 
 # ============================================
 # ダミー実装（フィーチャ）
 # ============================================
 
-def _dummy_feature(text: str) -> Dict[str, Any]:
-  """
-  LLM なしで動かすための簡易フィーチャ推定。
-  超ラフにキーワードで判定する。
-  """
-  t = text.lower()
-  logger.info("[DUMMY] feature extractor called with text=%r", text)
-
-  # フェイスミル
-  if "フェイス" in text or "荒取り" in text or "フェース" in text:
-      return {
-          "op": "mill:face",
-          "selector": ">Z",
-          "params": {
-              "depth": 2.0,
-          },
-      }
-
-  # ポケット
-  if "ポケット" in text:
-      return {
-          "op": "mill:pocket_profile",
-          "name": "RectPocket",
-          "selector": ">Z",
-          "params": {
-              "profile_type": "rect",
-              "center": {"x": 0.0, "y": 0.0},
-              "size": {"x": 40.0, "y": 30.0},
-              "depth": 10.0,
-              "corner_radius": 4.0,
-          },
-      }
-
-  # 穴（ドリル）
-  if "穴" in text or "ドリル" in text:
-      return {
-          "op": "drill:hole",
-          "selector": ">Z",
-          "params": {
-              "dia": 10.0,
-              "depth": 15.0,
-              "x": 0.0,
-              "y": 0.0,
-          },
-      }
-
-  # それ以外は一旦「浅いフェイスミル」にしておく
-  return {
-      "op": "mill:face",
-      "selector": ">Z",
-      "params": {
-          "depth": 1.0,
-      },
-  }
-
-
-async def call_feature_extractor(text: str, language: str | None = "ja") -> Dict[str, Any]:
+# キーワード → ダミー結果。1 回の正規表現スキャンで判定する
+_FEATURE_RE = re.compile(
+    r"(?P<face>フェイス|フェース|荒取り)|(?P<pocket>ポケット)|(?P<hole>穴|ドリル)"
+)
+
+# 複数ヒットしたときの優先順（フェイス → ポケット → 穴）
+_FEATURE_PRIORITY = ("face", "pocket", "hole")
+
+# 各結果は読み取り専用（MappingProxyType）で共有し、そのまま返す
+_FEATURE_RESULTS: Dict[str | None, Mapping[str, Any]] = {
+    # フェイスミル
+    "face": MappingProxyType({
+        "op": "mill:face",
+        "selector": ">Z",
+        "params": {
+            "depth": 2.0,
+        },
+    }),
+    # ポケット
+    "pocket": MappingProxyType({
+        "op": "mill:pocket_profile",
+        "name": "RectPocket",
+        "selector": ">Z",
+        "params": {
+            "profile_type": "rect",
+            "center": {"x": 0.0, "y": 0.0},
+            "size": {"x": 40.0, "y": 30.0},
+            "depth": 10.0,
+            "corner_radius": 4.0,
+        },
+    }),
+    # 穴（ドリル）
+    "hole": MappingProxyType({
+        "op": "drill:hole",
+        "selector": ">Z",
+        "params": {
+            "dia": 10.0,
+            "depth": 15.0,
+            "x": 0.0,
+            "y": 0.0,
+        },
+    }),
+    # それ以外は一旦「浅いフェイスミル」にしておく
+    None: MappingProxyType({
+        "op": "mill:face",
+        "selector": ">Z",
+        "params": {
+            "depth": 1.0,
+        },
+    }),
+}
+
+
+def _dummy_feature(text: str) -> Mapping[str, Any]:
+    """
+    LLM なしで動かすための簡易フィーチャ推定。
+    超ラフにキーワードで判定する。
+    """
+    logger.info("[DUMMY] feature extractor called with text=%r", text)
+
+    hits = {m.lastgroup for m in _FEATURE_RE.finditer(text)}
+    key = next((k for k in _FEATURE_PRIORITY if k in hits), None)
+    return _FEATURE_RESULTS[key]
+
+
+async def call_feature_extractor(text: str, language: str | None = "ja") -> Mapping[str, Any]:
     """
     フィーチャ命令（自然言語） → 単一フィーチャ JSON を返す。
 
@@ -403,38 +846,97 @@ async def call_feature_extractor(text: str, language: str | None = "ja") -> Dict
     if NL_DUMMY_MODE or not AZURE_OPENAI_ENDPOINT or not AZURE_OPENAI_API_KEY:
         return _dummy_feature(text)
 
-    messages = list(_FEATURE_FEWSHOT_MESSAGES) + [
-        {"role": "user", "content": text}
-    ]
+    payload = _build_payload(_FEATURE_PREFIX_BYTES, text, prompt_cache_key="feature_v1")
+
+    key = _cache_key(AZURE_OPENAI_FEATURE_DEPLOYMENT, payload)
+    cached = await _cache_get(key, _is_valid_feature_result)
+    if cached is not None:
+        return cached
 
     try:
         content = await _call_chat_completion_azure(
             AZURE_OPENAI_FEATURE_DEPLOYMENT,
-            messages,
+            payload,
         )
     except LLMConfigError as e:
         logger.error("LLM config error in call_feature_extractor: %s", e)
         # 設定エラー時もダミーにフォールバック
         return _dummy_feature(text)
 
-    # Try direct JSON parse first, fall back to extraction if necessary
-    try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
+    # content は JSON 文字列を想定（前後に説明文やフェンスがあれば切り出す）
+    data = _parse_llm_json(content, "feature")
+
+    return await _cache_put_valid(key, data, _is_valid_feature_result)
+
+
+def _batch_instruction(texts: List[str]) -> str:
+    """複数のフィーチャ命令を 1 つのユーザー発話にまとめる（番号順に JSON 配列で返させる）。"""
+    lines = "\n".join(f"{i}. {t}" for i, t in enumerate(texts, start=1))
+    return (
+        f"Extract one feature for each of the {len(texts)} numbered instructions below. "
+        f"Output ONLY a JSON array of exactly {len(texts)} objects in the same order, "
+        "each with keys \"op\", \"selector\", and \"params\".\n"
+        f"{lines}"
+    )
+
+
+async def call_feature_extractor_batch(
+    texts: List[str], language: str | None = "ja"
+) -> List[Mapping[str, Any]]:
+    """
+    複数のフィーチャ命令（自然言語） → 単一フィーチャ JSON のリスト（入力と同じ順）。
+
+    キャッシュ済みの命令はそのまま使い、残りだけを 1 回の LLM 呼び出しにまとめる。
+    まとめて得た結果は 1 件ずつ call_feature_extractor と同じキーでキャッシュするので、
+    後から単発で同じ命令が来てもヒットする。
+    ダミーモード or 設定不足のときは _dummy_feature を使う。
+    """
+    if NL_DUMMY_MODE or not AZURE_OPENAI_ENDPOINT or not AZURE_OPENAI_API_KEY:
+        return [_dummy_feature(t) for t in texts]
+
+    results: List[Mapping[str, Any] | None] = [None] * len(texts)
+    pending: List[Tuple[int, str]] = []  # (index, cache key)
+    for i, text in enumerate(texts):
+        payload = _build_payload(_FEATURE_PREFIX_BYTES, text, prompt_cache_key="feature_v1")
+        key = _cache_key(AZURE_OPENAI_FEATURE_DEPLOYMENT, payload)
+        cached = await _cache_get(key, _is_valid_feature_result)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, key))
+
+    if len(pending) == 1:
+        i, _ = pending[0]
+        results[i] = await call_feature_extractor(texts[i], language)
+    elif pending:
+        batch_text = _batch_instruction([texts[i] for i, _ in pending])
+        payload = _build_payload(_FEATURE_PREFIX_BYTES, batch_text, prompt_cache_key="feature_v1")
         try:
-            json_text = _extract_json_text(content)
-            data = json.loads(json_text)
-        except ValueError as ex:
-            logger.exception("Failed to extract JSON from feature extractor output: %s", content)
-            raise HTTPException(
-                status_code=502,
-                detail="LLM feature extractor did not return valid JSON.",
-            ) from ex
-        except json.JSONDecodeError as ex:
-            logger.exception("Failed to parse extracted JSON from feature extractor: %s", json_text)
+            content = await _call_chat_completion_azure(
+                AZURE_OPENAI_FEATURE_DEPLOYMENT,
+                payload,
+            )
+        except LLMConfigError as e:
+            logger.error("LLM config error in call_feature_extractor_batch: %s", e)
+            # 設定エラー時もダミーにフォールバック
+            return [_dummy_feature(t) for t in texts]
+
+        data = _parse_llm_json(content, "feature")
+        if (
+            not isinstance(data, list)
+            or len(data) != len(pending)
+            or not all(isinstance(item, dict) for item in data)
+        ):
+            logger.error(
+                "Feature batch extractor returned %s items for %d instructions",
+                len(data) if isinstance(data, list) else "non-list",
+                len(pending),
+            )
             raise HTTPException(
                 status_code=502,
-                detail="LLM feature extractor returned invalid JSON after extraction.",
-            ) from ex
+                detail="LLM feature extractor did not return one result per instruction.",
+            )
+        for (i, key), item in zip(pending, data):
+            results[i] = await _cache_put_valid(key, item, _is_valid_feature_result)
 
-    return data
+    return results  # type: ignore[return-value]
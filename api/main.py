@@ -1,16 +1,28 @@
 
 from __future__ import annotations
+import asyncio
+import atexit
+import contextlib
+import dataclasses
 import os
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
 from pathlib import Path
 import logging
+import logging.handlers
+import queue
+import string
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+import orjson
 from fastapi.staticfiles import StaticFiles
-import cadquery as cq
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+from pydantic import TypeAdapter, ValidationError
 from .models import (
-    PipelineRequest,
-    PipelineResponse,
-    StepResult,
     NLStockRequest,
     NLStockResponse,
     NLFeatureRequest,
@@ -21,9 +33,31 @@ from .models import (
     FeaturePipelineResponse,
     FeatureStepResult,
 )
-from .llm_client import call_stock_extractor, call_feature_extractor
-from .cad_ops import OpError, build_stock
-from .process_context import ProcessContext, FeatureError
+from .llm_client import (
+    call_stock_extractor,
+    call_feature_extractor,
+    call_feature_extractor_batch,
+    open_http_client,
+    close_http_client,
+    clear_llm_cache,
+)
+
+# cadquery / OCCT は import に数秒かかるので、/pipeline/run で初めて必要になるまで読まない
+if TYPE_CHECKING:
+    import cadquery as cq
+    from .process_context import ProcessContext, StepRecord
+
+_CQ = None
+
+
+def _cq():
+    """cadquery モジュールを返す（初回だけ import）。"""
+    global _CQ
+    if _CQ is None:
+        import cadquery
+
+        _CQ = cadquery
+    return _CQ
 
 
 # -----------------------------
@@ -34,52 +68,203 @@ LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "server.log"
 
 # basicConfig affects root logger; keep it idempotent
+# 実際の書き込みは QueueListener のスレッドで行い、イベントループ上でファイル I/O を待たない
 if not logging.getLogger().handlers:
+    _log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    _log_targets = [
+        logging.StreamHandler(),
+        logging.FileHandler(LOG_FILE, encoding="utf-8"),
+    ]
+    for _h in _log_targets:
+        _h.setFormatter(_log_formatter)
+
+    _log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(
+        _log_queue, *_log_targets, respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(LOG_FILE, encoding="utf-8")
-        ],
+        handlers=[logging.handlers.QueueHandler(_log_queue)],
     )
 
 logger = logging.getLogger("pipeline")
 
-app = FastAPI(title="Removal Process API", version="0.1.0")
+class ORJSONResponse(JSONResponse):
+    """orjson でシリアライズする既定レスポンス（dict の非文字列キー・numpy 値も許可）"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+app = FastAPI(
+    title="Removal Process API",
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+)
 
 ROOT = Path(__file__).resolve().parents[1]
 OUTDIR = ROOT / "data" / "output"
 OUTDIR.mkdir(parents=True, exist_ok=True)
+_OUTDIR_STR = str(OUTDIR)
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles に Cache-Control を付けたもの。
+    ETag / Last-Modified は Starlette の FileResponse が付けるので、
+    再取得は 304 で済む。
+    """
+
+    def __init__(self, *args, cache_control: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers.setdefault("Cache-Control", self.cache_control)
+        return response
+
 
 # 静的ファイル公開: Web UI と出力ディレクトリ
 app.mount(
     "/ui",
-    StaticFiles(directory=str(ROOT / "web"), html=True),
+    CachedStaticFiles(
+        directory=str(ROOT / "web"),
+        html=True,
+        cache_control="public, max-age=3600",
+    ),
     name="ui",
 )
 
+# 出力ファイルは同じ名前で上書きされるので、毎回 ETag で再検証させる
 app.mount(
     "/output",
-    StaticFiles(directory=str(ROOT / "data" / "output")),
+    CachedStaticFiles(
+        directory=str(OUTDIR),
+        cache_control="no-cache",
+    ),
     name="output",
 )
 
-def _export_stl(solid: cq.Workplane, path: Path):
-    from cadquery import exporters
-    path.parent.mkdir(parents=True, exist_ok=True)
-    exporters.export(solid, str(path))
+@app.on_event("startup")
+async def _startup_http_client() -> None:
+    await open_http_client()
+
+
+@app.on_event("shutdown")
+async def _shutdown_http_client() -> None:
+    await close_http_client()
+    _PIPELINE_PROCS.shutdown(wait=False, cancel_futures=True)
+    _CAD_POOL.shutdown(wait=False)
+    if _STREAM_MANAGER is not None:
+        _STREAM_MANAGER.shutdown()
+
+
+# ファイルを書き出す output_mode
+_EXPORT_MODES = frozenset({"step", "stl"})
+
+# CAD ワーカープロセス 1 つあたりのアドレス空間上限（bytes, 0 で無制限）と、
+# 何リクエスト処理したら作り直すか（OCCT のメモリ断片化対策）
+CAD_WORKER_MEMORY_LIMIT = int(os.getenv("CAD_WORKER_MEMORY_LIMIT", str(8 << 30)))
+CAD_WORKER_MAX_TASKS = int(os.getenv("CAD_WORKER_MAX_TASKS", "50"))
+
+
+def _init_cad_worker(memory_limit: int) -> None:
+    """ワーカープロセスの初期化：RLIMIT_AS で暴走した形状がサーバー全体を巻き込まないようにする。"""
+    try:
+        import resource
+    except ImportError:  # Windows には RLIMIT がない
+        return
+    if memory_limit > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _new_pipeline_pool() -> ProcessPoolExecutor:
+    # OCCT の Boolean は GIL を握ったままのことが多いので、リクエストごとにワーカープロセスで実行する。
+    # fork は OCCT / スレッドと相性が悪いので spawn
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 4,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_cad_worker,
+        initargs=(CAD_WORKER_MEMORY_LIMIT,),
+        max_tasks_per_child=CAD_WORKER_MAX_TASKS or None,
+    )
+
+
+# /pipeline/run 用のプロセスプール（ワーカーが落ちたら作り直す）
+_PIPELINE_PROCS = _new_pipeline_pool()
+
+
+def _replace_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """ワーカーが死んで壊れたプールを新しいものに差し替える（既に差し替え済みなら何もしない）。"""
+    global _PIPELINE_PROCS
+    if _PIPELINE_PROCS is pool:
+        _PIPELINE_PROCS = _new_pipeline_pool()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+_WORKER_DIED_DETAIL = "CAD worker ran out of memory or crashed while processing the pipeline."
+
+# /pipeline/run:stream でワーカープロセスからステップ結果を受け取るキューの管理プロセス（初回に起動）
+_STREAM_MANAGER = None
+
+# ワーカープロセス内でステップごとのエクスポートを並列に行うスレッドプール
+_CAD_POOL = ThreadPoolExecutor(
+    max_workers=min(8, os.cpu_count() or 4),
+    thread_name_prefix="cad",
+)
+
+
+# STL メッシュの許容値（絶対値: mm / rad）。相対値だと大小の形状が混ざったときに
+# 粗すぎ・細かすぎのメッシュになるので、絶対値で固定する
+_STL_TOLERANCE = 0.05
+_STL_ANGULAR_TOLERANCE = 0.2
+
+
+def _export_stl(solid: cq.Workplane, path: Path | str):
+    """
+    solid をバイナリ STL で書き出す。
+    OCCT の BRepMesh を絶対許容値・並列モードで直接呼ぶ（cq.exporters の既定は相対許容値）。
+    """
+    from OCP.BRepMesh import BRepMesh_IncrementalMesh
+    from OCP.StlAPI import StlAPI_Writer
+    from OCP.TopAbs import TopAbs_FACE
+    from OCP.TopExp import TopExp_Explorer
+    from .cad_ops import OpError
+
+    shapes = solid.vals()
+    if len(shapes) == 1:
+        shape = shapes[0].wrapped
+    else:
+        shape = _cq().Compound.makeCompound(shapes).wrapped
+
+    # 面がない（cut で stock が全部削れた等）と StlAPI_Writer は何も書かずに False を返す
+    if shape.IsNull() or not TopExp_Explorer(shape, TopAbs_FACE).More():
+        raise OpError("shape has no faces (the whole solid may have been removed)")
+
+    BRepMesh_IncrementalMesh(shape, _STL_TOLERANCE, False, _STL_ANGULAR_TOLERANCE, True)
+
+    writer = StlAPI_Writer()
+    writer.ASCIIMode = False
+    if not writer.Write(shape, str(path)):
+        raise OpError("StlAPI_Writer could not write the meshed shape")
 
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f">>> {request.method} {request.url.path}")
+    logger.info(">>> %s %s", request.method, request.url.path)
     try:
         response = await call_next(request)
-        logger.info(f"<<< {request.method} {request.url.path} {response.status_code}")
+        logger.info("<<< %s %s %s", request.method, request.url.path, response.status_code)
         return response
     except Exception as ex:
-        logger.exception(f"Unhandled exception during {request.method} {request.url.path}")
+        logger.exception("Unhandled exception during %s %s", request.method, request.url.path)
         raise
 
 
@@ -112,8 +297,6 @@ async def nl_stock(req: NLStockRequest) -> NLStockResponse:
         )
 
     # Pydantic Stock モデルにバインド
-    from .models import Stock  # ローカル import で循環参照を回避
-
     stock_obj = Stock(**result["stock"])
     logger.info("NL stock extracted: type=%s params=%s", stock_obj.type, stock_obj.params)
 
@@ -141,8 +324,6 @@ async def nl_feature(req: NLFeatureRequest) -> NLFeatureResponse:
             detail="LLM feature extractor did not return required keys.",
         )
 
-    from .models import Operation  # ローカル import で循環参照を回避
-
     op_obj = Operation(**result)
     logger.info(
         "NL feature extracted: op=%s selector=%s params=%s",
@@ -153,13 +334,334 @@ async def nl_feature(req: NLFeatureRequest) -> NLFeatureResponse:
 
     return NLFeatureResponse(op=op_obj)
 
-@app.post("/pipeline/run", response_model=FeaturePipelineResponse)
-async def run_pipeline(req: FeaturePipelineRequest) -> FeaturePipelineResponse:
+@app.post("/nl/features:batch", response_model=list[NLFeatureResponse])
+async def nl_features_batch(reqs: list[NLFeatureRequest]) -> list[NLFeatureResponse]:
+    """
+    複数のフィーチャ命令（日本語） → Operation JSON のリスト（入力と同じ順）
+
+    まとめて入力された発話を 1 回の LLM 呼び出しで抽出する
+    （キャッシュ済みの発話は呼び出しに含めない）。
+    """
+    logger.info(">>> POST /nl/features:batch n=%d", len(reqs))
+    if not reqs:
+        return []
+
+    results = await call_feature_extractor_batch(
+        [r.text for r in reqs], language=reqs[0].language
+    )
+
+    responses: list[NLFeatureResponse] = []
+    for result in results:
+        if "op" not in result or "params" not in result:
+            logger.error("Feature extractor result missing required keys: %s", result)
+            raise HTTPException(
+                status_code=500,
+                detail="LLM feature extractor did not return required keys.",
+            )
+        responses.append(NLFeatureResponse(op=Operation(**result)))
+    return responses
+
+
+@app.post("/admin/cache/clear")
+async def admin_cache_clear() -> dict:
+    """LLM 抽出結果のプロンプトキャッシュを破棄する。"""
+    cleared = await clear_llm_cache()
+    logger.info("LLM cache cleared: entries=%d", cleared)
+    return {"cleared": cleared}
+
+
+# /pipeline/run の body は生 bytes を pydantic-core で 1 回だけ decode + 検証する
+_PIPELINE_REQ_ADAPTER = TypeAdapter(FeaturePipelineRequest)
+
+# body を Request から直接読むと FastAPI が request schema を出さないので、OpenAPI には明示する
+# （Web UI / C# クライアントのドキュメントが参照する）
+_PIPELINE_REQ_OPENAPI = {
+    "requestBody": {
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/FeaturePipelineRequest"},
+            },
+        },
+        "required": True,
+    },
+}
+
+
+def _openapi_with_pipeline_request() -> dict:
+    """既定の OpenAPI に FeaturePipelineRequest（と参照先の $defs）の schema を足す。"""
+    if app.openapi_schema is None:
+        schema = _default_openapi()
+        req_schema = FeaturePipelineRequest.model_json_schema(
+            ref_template="#/components/schemas/{model}"
+        )
+        components = schema.setdefault("components", {}).setdefault("schemas", {})
+        for name, sub in req_schema.pop("$defs", {}).items():
+            components.setdefault(name, sub)
+        components["FeaturePipelineRequest"] = req_schema
+    return app.openapi_schema
+
+
+_default_openapi = app.openapi
+app.openapi = _openapi_with_pipeline_request
+
+
+@app.post("/pipeline/run", response_model=FeaturePipelineResponse, openapi_extra=_PIPELINE_REQ_OPENAPI)
+async def run_pipeline(request: Request) -> FeaturePipelineResponse:
     """
     Feature-based pipeline (AP238 L0 features with GeometryDelta)
     Unified endpoint for both legacy Operation-based and new Feature-based requests.
+
+    リクエスト body は FeaturePipelineRequest の JSON。FastAPI の json → dict → 検証の
+    経路を通さず、TypeAdapter.validate_json で直接モデルにする。
+
+    CAD 処理（stock 生成・フィーチャ適用・エクスポート）は CPU を握ったままなので
+    _PIPELINE_PROCS のワーカープロセスで実行し、イベントループを止めず複数コアを使う。
     """
     logger.info(">>> POST /pipeline/run")
+    try:
+        req = _PIPELINE_REQ_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    pool = _PIPELINE_PROCS
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(pool, _run_pipeline_sync, req)
+    except _PipelineHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except BrokenProcessPool:
+        # メモリ上限超過などでワーカーが死んだ。サーバーは生かしてプールだけ作り直す
+        logger.exception("PIPELINE worker died (memory limit or crash)")
+        _replace_broken_pool(pool)
+        raise HTTPException(status_code=507, detail=_WORKER_DIED_DETAIL)
+
+
+@app.post("/pipeline/run:stream", openapi_extra=_PIPELINE_REQ_OPENAPI)
+async def run_pipeline_stream(request: Request) -> StreamingResponse:
+    """
+    /pipeline/run と同じ処理を NDJSON（application/x-ndjson）で逐次返す。
+    各行は書き出しが終わった順（step 順）の FeatureStepResult、最終行は
+    steps を空にした FeaturePipelineResponse（status / message のみ）。
+    ストリーム開始後のエラーは HTTP ステータスではなく最終行の status="error" で伝える。
+    """
+    logger.info(">>> POST /pipeline/run:stream")
+    try:
+        req = _PIPELINE_REQ_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    return StreamingResponse(_stream_pipeline(req), media_type="application/x-ndjson")
+
+
+def _stream_queue():
+    global _STREAM_MANAGER
+    if _STREAM_MANAGER is None:
+        _STREAM_MANAGER = multiprocessing.get_context("spawn").Manager()
+    return _STREAM_MANAGER.Queue()
+
+
+async def _stream_pipeline(req: FeaturePipelineRequest) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    step_queue = await loop.run_in_executor(None, _stream_queue)
+    pool = _PIPELINE_PROCS
+    fut = asyncio.wrap_future(pool.submit(_run_pipeline_sync, req, step_queue))
+
+    # ワーカーが途中で死ぬと終端の None が来ないので、タイムアウト付きで待って fut も見る
+    get_line = partial(step_queue.get, timeout=0.5)
+    while True:
+        try:
+            line = await loop.run_in_executor(None, get_line)
+        except queue.Empty:
+            if fut.done():
+                break
+            continue
+        if line is None:
+            break
+        yield line + b"\n"
+
+    try:
+        final = await fut
+        final = FeaturePipelineResponse(status=final.status, message=final.message, steps=[])
+    except _PipelineHTTPError as e:
+        final = FeaturePipelineResponse(status="error", message=e.detail, steps=[])
+    except BrokenProcessPool:
+        logger.exception("PIPELINE worker died (memory limit or crash)")
+        _replace_broken_pool(pool)
+        final = FeaturePipelineResponse(status="error", message=_WORKER_DIED_DETAIL, steps=[])
+    except Exception:
+        logger.exception("PIPELINE stream failed (Unexpected)")
+        final = FeaturePipelineResponse(status="error", message="Internal error during pipeline", steps=[])
+    yield orjson.dumps(final.model_dump()) + b"\n"
+
+
+class _PipelineHTTPError(Exception):
+    """
+    ワーカープロセスから HTTP エラーを戻すための例外。
+    HTTPException は pickle で往復できないので、status_code / detail だけを運ぶ。
+    """
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _run_pipeline_sync(
+    req: FeaturePipelineRequest, step_queue=None
+) -> FeaturePipelineResponse:
+    """
+    /pipeline/run の本体（_PIPELINE_PROCS のワーカープロセスで実行）。
+    stock 生成・フィーチャ適用と並行して、確定したステップから順にエクスポートを
+    プロセス内の _CAD_POOL で並列に行う。返すのはファイルパスだけなので形状を pickle する必要はない。
+    step_queue を渡すと、各ステップの結果を（書き出しが終わり次第）step 順に JSON bytes で put し、
+    最後に None を put する。
+    """
+    try:
+        return _run_pipeline_steps(req, step_queue)
+    finally:
+        if step_queue is not None:
+            step_queue.put(None)
+
+
+class _StepPublisher:
+    """
+    ステップ結果を step 順に集め、step_queue があれば同じ順に put する。
+    エクスポートは _CAD_POOL 上で前後して終わるので、先に終わった後続ステップは
+    前のステップが出るまで保留する。
+    """
+
+    def __init__(self, step_queue) -> None:
+        self._queue = step_queue
+        self._cond = threading.Condition()
+        self._pending: dict[int, FeatureStepResult] = {}
+        self._next = 1
+        self._settled = 0
+        self.results: list[FeatureStepResult] = []
+
+    def publish(self, idx: int, step_result: FeatureStepResult) -> None:
+        with self._cond:
+            self._pending[idx] = step_result
+            self._release()
+
+    def publish_when_done(self, idx: int, fut: Future[FeatureStepResult]) -> None:
+        """fut が終わったら（_CAD_POOL のスレッド上で）その結果を publish する。失敗した分は出さない。"""
+
+        def done(f: Future[FeatureStepResult]) -> None:
+            with self._cond:
+                try:
+                    if not f.cancelled() and f.exception() is None:
+                        self._pending[idx] = f.result()
+                        self._release()
+                finally:
+                    # put が失敗しても wait_settled を止めない
+                    self._settled += 1
+                    self._cond.notify_all()
+
+        fut.add_done_callback(done)
+
+    def flush(self) -> None:
+        """保留中の結果を（前のステップが欠けていても）step 順に全部出す。エラー終了時に使う。"""
+        with self._cond:
+            while self._pending:
+                self._next = min(self._pending)
+                self._release()
+
+    def wait_settled(self, n: int) -> None:
+        """publish_when_done で登録した n 個の完了コールバックが全部終わるまで待つ。"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._settled >= n)
+
+    def _release(self) -> None:
+        while self._next in self._pending:
+            step_result = self._pending.pop(self._next)
+            self.results.append(step_result)
+            if self._queue is not None:
+                self._queue.put(orjson.dumps(step_result.model_dump()))
+            self._next += 1
+
+
+def _run_pipeline_steps(req: FeaturePipelineRequest, step_queue) -> FeaturePipelineResponse:
+    from .cad_ops import OpError
+
+    # 出力モードの判定はリクエストごとに 1 回だけ
+    do_export = req.output_mode in _EXPORT_MODES and not req.dry_run
+    publisher = _StepPublisher(step_queue)
+
+    # 書き出すときは、ステップが確定するたびに _CAD_POOL へエクスポートを投げる。
+    # 次のフィーチャの適用と前ステップの書き出しが重なり、書き終えた形状は早く手放せる
+    futures: list[Future[FeatureStepResult]] = []
+    made_dirs: set[str] = {_OUTDIR_STR}
+
+    def export_step(idx: int, step_record) -> None:
+        _ensure_step_dirs(req, idx, step_record, made_dirs)
+        # 書き出し中に次のステップの Boolean が同じ TShape / TFace を触らないよう、
+        # このスレッド上で複製してから渡す（BRepMesh は面にメッシュを書き込む）
+        fut = _CAD_POOL.submit(_export_one, req, idx, _detached_record(step_record), True)
+        futures.append(fut)
+        publisher.publish_when_done(idx, fut)
+
+    def record_step(idx: int, step_record) -> None:
+        publisher.publish(idx, _export_one(req, idx, step_record, False))
+
+    # 書き出さないときも、ストリーミング中は適用したステップをその場で流す。
+    # どちらでもなければ cut をまとめて適用し（batch_cuts）、最後に結果を作る
+    if do_export:
+        sink = export_step
+    elif step_queue is not None:
+        sink = record_step
+    else:
+        sink = None
+
+    try:
+        result = _build_and_apply(req, do_export, sink=sink)
+    except HTTPException as e:
+        raise _PipelineHTTPError(e.status_code, e.detail) from None
+    finally:
+        # 投げたエクスポート（失敗より前のステップ分も）が終わってから返す
+        publisher.wait_settled(len(futures))
+    if isinstance(result, FeaturePipelineResponse):
+        # 失敗より前に書き出したファイルはレスポンスから参照できるように返す
+        publisher.flush()
+        return FeaturePipelineResponse(
+            status=result.status, message=result.message, steps=publisher.results
+        )
+
+    try:
+        for f in futures:
+            f.result()
+    except OpError as e:
+        logger.exception("PIPELINE export failed (OpError): %s", e)
+        # 失敗したステップより後で書き出しが終わった分も返す
+        publisher.flush()
+        return FeaturePipelineResponse(status="error", message=str(e), steps=publisher.results)
+    except Exception as e:
+        logger.exception("PIPELINE export failed (Unexpected): %s", e)
+        publisher.flush()
+        return FeaturePipelineResponse(
+            status="error", message="Internal error during export", steps=publisher.results
+        )
+
+    if sink is None:
+        for idx, step_record in enumerate(result.steps, start=1):
+            record_step(idx, step_record)
+
+    logger.info("PIPELINE done: steps=%d", len(publisher.results))
+    return FeaturePipelineResponse(status="ok", message=None, steps=publisher.results)
+
+
+def _build_and_apply(
+    req: FeaturePipelineRequest,
+    do_export: bool,
+    sink: Callable[[int, StepRecord], None] | None = None,
+) -> ProcessContext | FeaturePipelineResponse:
+    """
+    stock をビルドして全フィーチャを適用した ProcessContext を返す。
+    sink を渡すと各ステップを確定順に sink へ流す（ctx.steps には残らない）。
+    フィーチャ適用の失敗は status="error" のレスポンスをそのまま返す。
+    """
+    from .cad_ops import OpError, build_stock
+    from .process_context import ProcessContext, FeatureError
+
     logger.info(
         "PIPELINE start: units=%s origin=%s features=%d out=%s",
         req.units,
@@ -168,8 +670,8 @@ async def run_pipeline(req: FeaturePipelineRequest) -> FeaturePipelineResponse:
         req.output_mode,
     )
 
-    # CSYS リストのログ
-    if req.csys_list:
+    # CSYS リストのログ（INFO が無効なら一覧を回さない）
+    if req.csys_list and logger.isEnabledFor(logging.INFO):
         logger.info("CSYS count: %d", len(req.csys_list))
         for cs in req.csys_list:
             logger.info("  - csys name=%s role=%s", cs.name, cs.role)
@@ -179,12 +681,9 @@ async def run_pipeline(req: FeaturePipelineRequest) -> FeaturePipelineResponse:
         solid = build_stock(req.stock)
         logger.info("STOCK built: type=%s params=%s", req.stock.type, req.stock.params)
 
-        # リクエストを dict に変換して ProcessContext に渡す
-        req_dict = req.dict()
-        
-        # ProcessContext を初期化（stock は既にビルド済みなので上書き）
-        ctx = ProcessContext.from_request(req_dict)
-        ctx.solid = solid  # build_stock で作成した solid で上書き
+        # リクエストモデルをそのまま渡す（.dict() で特徴グラフを丸ごとコピーしない）
+        # stock は既にビルド済みなので solid も渡して作り直させない
+        ctx = ProcessContext.from_request(req, solid=solid)
         
     except OpError as e:
         logger.exception("PIPELINE stock build failed (OpError): %s", e)
@@ -193,91 +692,181 @@ async def run_pipeline(req: FeaturePipelineRequest) -> FeaturePipelineResponse:
         logger.exception("PIPELINE stock build failed (Unexpected): %s", e)
         raise HTTPException(status_code=500, detail="Internal error during stock build")
 
-    step_results: list[FeatureStepResult] = []
-
     try:
         # 全フィーチャを適用
-        ctx.apply_all_features(req.features)
+        # 途中形状を書き出さないときは、連続する cut をまとめて 1 回の Boolean にする
+        if sink is not None:
+            ctx.apply_all_features_streaming(req.features, sink)
+        else:
+            ctx.apply_all_features(req.features, batch_cuts=not do_export)
     except FeatureError as e:
         logger.exception("PIPELINE failed (FeatureError): %s", e)
         return FeaturePipelineResponse(
             status="error",
             message=f"Feature processing failed: {e}",
-            steps=step_results,
+            steps=[],
         )
     except Exception as e:
         logger.exception("PIPELINE failed (Unexpected): %s", e)
         return FeaturePipelineResponse(
             status="error",
             message="Internal error during feature processing",
-            steps=step_results,
+            steps=[],
         )
 
-    # ステップ結果をエクスポート
-    for idx, step_record in enumerate(ctx.steps, start=1):
-        name_safe = step_record.name or f"step{idx:02d}"
-        feature_type = step_record.feature.get("feature_type", "unknown")
-        
-        logger.info(
-            "STEP %02d: name=%s feature_type=%s",
-            idx,
-            name_safe,
-            feature_type,
+    return ctx
+
+
+def _step_name_safe(idx: int, step_record) -> str:
+    return step_record.name or f"step{idx:02d}"
+
+
+@lru_cache(maxsize=64)
+def _compile_template(template: str) -> Callable[[int, str], str]:
+    """
+    file_template_* を 1 回だけ解析して (step, name) → ファイル名 の関数にする。
+    フィールドが {step[:spec]} / {name[:spec]} だけなら分割済みの断片を join するだけ。
+    変換（!r）や属性アクセスなどを含む場合は str.format にフォールバック。
+    """
+    parts: list[tuple[str, str | None, str]] = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if field is not None and (field not in ("step", "name") or conversion or "{" in (spec or "")):
+            return lambda step, name: template.format(step=step, name=name)
+        parts.append((literal, field, spec or ""))
+
+    def render(step: int, name: str) -> str:
+        values = {"step": step, "name": name}
+        return "".join(
+            literal if field is None else literal + format(values[field], spec)
+            for literal, field, spec in parts
         )
 
-        solid_path: str | None = None
-        removed_path: str | None = None
+    return render
 
-        # 出力モードが step または stl の場合のみファイルを書き出す
-        if req.output_mode in ["step", "stl"] and not req.dry_run:
-            solid_path = str(
-                (ROOT / "data" / "output" / req.file_template_solid.format(
-                    step=idx,
-                    name=name_safe,
-                )).resolve()
-            )
-            removed_path = str(
-                (ROOT / "data" / "output" / req.file_template_removed.format(
-                    step=idx,
-                    name=name_safe,
-                )).resolve()
-            )
 
-            os.makedirs(os.path.dirname(solid_path), exist_ok=True)
+def _output_path(template: str, idx: int, name: str) -> str:
+    """
+    OUTDIR 配下の出力パス（絶対パス）。OUTDIR は既に絶対パスなので resolve() で
+    ファイルシステムを見に行かず、文字列の正規化（".." の解決）だけ行う。
+    """
+    return os.path.normpath(os.path.join(_OUTDIR_STR, _compile_template(template)(idx, name)))
 
+
+def _ensure_step_dirs(
+    req: FeaturePipelineRequest, idx: int, step_record, made_dirs: set[str]
+) -> None:
+    """
+    1 ステップ分の出力先の親ディレクトリを作る。
+    OUTDIR は import 時に作成済みなので、テンプレートや name にサブディレクトリが
+    含まれる場合だけ mkdir が走る（作ったディレクトリは made_dirs に覚えて繰り返さない）。
+    """
+    name = _step_name_safe(idx, step_record)
+    for tpl in (req.file_template_solid, req.file_template_removed):
+        d = os.path.dirname(_output_path(tpl, idx, name))
+        if d not in made_dirs:
+            os.makedirs(d, exist_ok=True)
+            made_dirs.add(d)
+
+
+def _detached_record(step_record: StepRecord) -> StepRecord:
+    """solid / removed を BRepBuilderAPI_Copy で複製し、元の形状と TShape を共有しない StepRecord を返す。"""
+
+    def copy(wp: cq.Workplane | None) -> cq.Workplane | None:
+        if wp is None:
+            return None
+        return wp.newObject([s.copy() for s in wp.vals()])
+
+    delta = step_record.delta
+    return dataclasses.replace(
+        step_record,
+        delta=dataclasses.replace(delta, solid=copy(delta.solid), removed=copy(delta.removed)),
+    )
+
+
+def _export_one(
+    req: FeaturePipelineRequest, idx: int, step_record, do_export: bool
+) -> FeatureStepResult:
+    """
+    1 ステップ分の solid / removed を書き出し、FeatureStepResult を返す（ワーカー内の _CAD_POOL 上で実行）。
+    ステップ同士は独立なので並列に呼んでよい。
+    """
+    name_safe = _step_name_safe(idx, step_record)
+    feature_type = step_record.feature.get("feature_type", "unknown")
+
+    logger.info(
+        "STEP %02d: name=%s feature_type=%s",
+        idx,
+        name_safe,
+        feature_type,
+    )
+
+    solid_path: str | None = None
+    removed_path: str | None = None
+
+    # 出力モードが step または stl の場合のみファイルを書き出す
+    if do_export:
+        solid_path = _output_path(req.file_template_solid, idx, name_safe)
+        removed_path = _output_path(req.file_template_removed, idx, name_safe)
+
+        export_step = req.output_mode == "step"
+        try:
             # Solid をエクスポート
             if step_record.delta.solid is not None:
-                if req.output_mode == "step":
-                    step_record.delta.solid.val().exportStep(solid_path)
-                else:
-                    cq.exporters.export(step_record.delta.solid, solid_path)
+                _export_shape(step_record.delta.solid, solid_path, export_step)
 
             # Removed をエクスポート
             if step_record.delta.removed is not None:
-                if req.output_mode == "step":
-                    step_record.delta.removed.val().exportStep(removed_path)
-                else:
-                    cq.exporters.export(step_record.delta.removed, removed_path)
-
-            logger.info(
-                "STEP %02d EXPORTED: solid=%s removed=%s",
-                idx,
-                solid_path,
-                removed_path,
-            )
+                _export_shape(step_record.delta.removed, removed_path, export_step)
+        except BaseException:
+            # 失敗したステップのファイルは片方だけ残さない（レスポンスから参照されないため）
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(solid_path)
+            raise
 
-        step_results.append(
-            FeatureStepResult(
-                step=idx,
-                name=name_safe,
-                feature_type=feature_type,
-                solid=solid_path,
-                removed=removed_path,
-            )
+        logger.info(
+            "STEP %02d EXPORTED: solid=%s removed=%s",
+            idx,
+            solid_path,
+            removed_path,
         )
 
-    logger.info("PIPELINE done: steps=%d", len(step_results))
-    return FeaturePipelineResponse(status="ok", message=None, steps=step_results)
+    return FeatureStepResult(
+        step=idx,
+        name=name_safe,
+        feature_type=feature_type,
+        solid=solid_path,
+        removed=removed_path,
+    )
+
+
+# STEP writer（XSControl）はスレッド間で共有される静的状態を持つので直列化する。
+# STL（メッシュ化 + 書き出し）はステップごとに並列でよい。
+_STEP_EXPORT_LOCK = threading.Lock()
+
+
+def _export_shape(wp: cq.Workplane, path: str, export_step: bool) -> None:
+    """
+    同じディレクトリの一時ファイルに書いてから os.replace で差し替える。
+    /output から配信中のファイルが書きかけの状態で見えないようにする。
+    """
+    from .cad_ops import OpError
+
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        if export_step:
+            with _STEP_EXPORT_LOCK:
+                wp.val().exportStep(tmp_path)
+        else:
+            _export_stl(wp, tmp_path)
+        os.replace(tmp_path, path)
+    except OpError as e:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise OpError(f"Export to {path} failed: {e}") from None
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
 
 
 if __name__ == "__main__":
@@ -292,5 +881,5 @@ if __name__ == "__main__":
 
     port = int(os.environ.get("PORT", "8000"))
     host = os.environ.get("HOST", "0.0.0.0")
-    logger.info(f"Starting uvicorn on {host}:{port}")
+    logger.info("Starting uvicorn on %s:%s", host, port)
     uvicorn.run("api.main:app", host=host, port=port, log_level="info")
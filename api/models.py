@@ -1,11 +1,20 @@
 # api/models.py
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from typing import Literal, Optional, Dict, List, Union, Any
 
 Num = Union[float, int]
 
+# 入力モデルは検証後に書き換えない（ワーカーへ渡したり、キャッシュのキーに使ったりする前提）
+_FROZEN = ConfigDict(frozen=True)
+
+# 旧 Operation ベースのパイプライン用モデルはどのルートも使わないので、
+# スキーマ（pydantic-core のバリデータ）は初めて使われるまで作らない
+_LEGACY = ConfigDict(defer_build=True)
+
 class Operation(BaseModel):
+    model_config = _FROZEN
+
     op: str
     name: Optional[str] = None
     setup: Optional[str] = None
@@ -14,11 +23,25 @@ class Operation(BaseModel):
     csys: Optional[Dict[str, List[float]]] = None # 予約（STEP2で回転・平行移動対応）
     params: Dict[str, Any] = Field(default_factory=dict)
 
+    # cad_ops が検証済みの工具ビルダを初回に詰める（params は読み込み後に変更しない前提）
+    _cutter: Any = PrivateAttr(default=None)
+
 class Stock(BaseModel):
+    model_config = _FROZEN
+
     type: Literal["block", "cylinder", "mesh"]
     params: Dict[str, Num | str]
 
+def _fast_stock(d: Dict[str, Any]) -> Stock:
+    """
+    検証済み（信頼できる）dict から Stock を検証なしで作る。
+    API 境界で受けた生の入力には使わず、Stock(**d) で検証すること。
+    """
+    return Stock.model_construct(**d)
+
 class PipelineRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     units: Literal["mm","inch"] = "mm"
     origin: Literal["world","center","stock_min"] = "world"
     stock: Stock
@@ -30,12 +53,16 @@ class PipelineRequest(BaseModel):
     dry_run: bool = False
 
 class StepResult(BaseModel):
+    model_config = _LEGACY
+
     step: int
     name: str
     solid: Optional[str] = None
     removed: Optional[str] = None
 
 class PipelineResponse(BaseModel):
+    model_config = _LEGACY
+
     status: Literal["ok","error"]
     message: Optional[str] = None
     steps: List[StepResult] = Field(default_factory=list)
@@ -86,6 +113,8 @@ class NLFeatureResponse(BaseModel):
 
 class Csys(BaseModel):
     """座標系定義 (csys_list 用)"""
+    model_config = _FROZEN
+
     name: str
     role: Optional[str] = "local"
     parent: Optional[str] = None
@@ -96,6 +125,8 @@ class Csys(BaseModel):
 
 class Feature(BaseModel):
     """AP238 L0 Feature の基底型"""
+    model_config = _FROZEN
+
     feature_type: str
     id: str
     metadata: Optional[Dict[str, Any]] = None
@@ -106,6 +137,8 @@ class FeaturePipelineRequest(BaseModel):
     """
     Feature-based pipeline request (AP238 L0 features)
     """
+    model_config = _FROZEN
+
     units: Literal["mm", "inch"] = "mm"
     origin: Literal["world", "center", "stock_min"] = "world"
     stock: Stock
@@ -1,18 +1,24 @@
 # api/process_context.py
 from __future__ import annotations
+import hashlib
+import os
+from collections import OrderedDict
+from copy import copy
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Tuple, Union
 import cadquery as cq
+import orjson
 
 from .csys import CsysDef, build_csys_index
-from .geometry.volume_3d import GeometryDelta
-from .feature.turn_od_profile import apply_turn_od_profile_geometry, FeatureError
-from .feature.planar_face import apply_planar_face_geometry
-from .feature.pocket_rectangular import apply_pocket_rectangular_geometry
-from .feature.simple_hole import apply_simple_hole_geometry
+from .geometry.volume_3d import GeometryDelta, batched_cut
+from .feature import FeatureError
+from .feature.dispatch import get_apply_fn
 
+if TYPE_CHECKING:
+    from .models import FeaturePipelineRequest
 
-@dataclass
+
+@dataclass(slots=True)
 class StepRecord:
     """
     1 フィーチャ適用ステップの記録。
@@ -25,69 +31,287 @@ class StepRecord:
     delta: GeometryDelta
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessContext:
     """
     フィーチャ適用の実行コンテキスト。
     - solid      : 現在のソリッド
     - csys_index : name → CsysDef
-    - steps      : 各ステップの GeometryDelta の履歴
+    - steps      : 各ステップの GeometryDelta の履歴（apply_all_features_streaming では溜めない）
+    - prefix_hash: stock / csys_list のハッシュ（途中状態キャッシュのキーの起点。None ならキャッシュしない）
     """
     solid: cq.Workplane
     csys_index: Dict[str, CsysDef]
     steps: List[StepRecord] = field(default_factory=list)
+    prefix_hash: Optional["hashlib._Hash"] = None
 
     @classmethod
-    def from_request(cls, req: Dict[str, Any]) -> "ProcessContext":
+    def from_request(
+        cls,
+        req: Union[Dict[str, Any], "FeaturePipelineRequest"],
+        solid: Optional[cq.Workplane] = None,
+        trusted: bool = True,
+    ) -> "ProcessContext":
         """
-        CaseN 風 JSON から初期コンテキストを生成。
+        CaseN 風 JSON（dict）または FeaturePipelineRequest から初期コンテキストを生成。
         stock / csys_list を解釈して最初の solid / csys_index を作る。
+        モデルは .dict() せずに属性を直接読む。solid を渡した場合は stock を作り直さない。
+        dict の stock は trusted=True なら検証を省く（_fast_stock）。
+        検証されていない外部入力の dict を渡すときは trusted=False にすること。
         """
-        stock_dict = req.get("stock") or {}
-        csys_list = req.get("csys_list") or []
-
-        # Stock を Pydantic モデルに変換してから build_stock を呼ぶ
-        from .models import Stock
+        from .models import Stock, _fast_stock
         from .cad_ops import build_stock
-        
-        stock_obj = Stock(**stock_dict)
-        solid = build_stock(stock_obj)
+
+        if isinstance(req, dict):
+            stock_dict = req.get("stock") or {}
+            stock = _fast_stock(stock_dict) if trusted else Stock(**stock_dict)
+            csys_list = req.get("csys_list") or []
+        else:
+            stock = req.stock
+            csys_list = [
+                {"name": cs.name, "role": cs.role, "origin": cs.origin, "rpy_deg": cs.rpy_deg}
+                for cs in req.csys_list
+            ]
+
+        if solid is None:
+            solid = build_stock(stock)
 
         csys_index = build_csys_index(csys_list)
-        return cls(solid=solid, csys_index=csys_index)
+        prefix_hash = hashlib.sha256(
+            orjson.dumps([stock.model_dump(), csys_list], option=orjson.OPT_SORT_KEYS)
+        )
+        return cls(solid=solid, csys_index=csys_index, prefix_hash=prefix_hash)
 
     def apply_feature(self, feature: Dict[str, Any]) -> None:
         """
         単一の feature を解釈して幾何を適用し、steps に GeometryDelta を蓄積。
         """
-        ft = feature.get("feature_type")
-        fid = feature.get("id", "UNKNOWN")
-        name = feature.get("name", fid)
+        self.steps.append(
+            self._apply_normalized(feature.get("feature_type"), _step_name(feature), feature)
+        )
 
-        if ft == "turn_od_profile":
-            delta = apply_turn_od_profile_geometry(self.solid, feature, self.csys_index)
+    def _apply_normalized(self, ft: Any, name: str, feature: Dict[str, Any]) -> StepRecord:
+        """
+        _normalize 済みの (feature_type, name, feature) を適用し、そのステップの記録を返す
+        （steps への追加は呼び出し側）。
+        """
+        delta = get_apply_fn(ft)(self.solid, feature, self.csys_index)
 
-        elif ft == "planar_face":
-            delta = apply_planar_face_geometry(self.solid, feature, self.csys_index)
+        # 次ステップ用 solid を更新
+        self.solid = delta.solid
+        return StepRecord(name=name, feature=feature, delta=delta)
 
-        elif ft == "pocket_rectangular":
-            delta = apply_pocket_rectangular_geometry(self.solid, feature, self.csys_index)
+    def apply_all_features(
+        self, features: List[Dict[str, Any]], batch_cuts: bool = False
+    ) -> None:
+        """
+        features 配列を順に適用。
 
-        elif ft == "simple_hole":
-            delta = apply_simple_hole_geometry(self.solid, feature, self.csys_index)
+        batch_cuts=True のときは、連続する cut モードの planar_face /
+        pocket_rectangular / simple_hole を工具ボリュームだけ集めて
+        batched_cut で 1 回の Boolean にまとめる。
+        まとめた区間の各ステップの solid は区間適用後の solid になるので、
+        ステップごとの途中形状を出力しない場合（dry_run 等）にだけ使うこと。
 
-        else:
-            raise FeatureError(f"Unsupported feature_type: {ft}")
+        from_request で作ったばかりのコンテキストなら、先頭から一致する feature 列の
+        途中状態をプロセス内キャッシュから再開し、その分の適用を飛ばす。
+        途中状態を保存するのは batch_cuts=False のとき（各ステップの solid が正しいとき）だけ。
+        batch_cuts=True なら最長一致から再開し、それより前のステップは形状なしの記録になる。
+        """
+        keys = self._prefix_keys(features)
+        start, resumed = self._resume_from_cache(keys, features, history=not batch_cuts)
+        self.steps.extend(resumed)
+        normalized = _normalize(features[start:])
 
-        # 次ステップ用 solid を更新
-        self.solid = delta.solid
+        if not batch_cuts:
+            for i, (ft, name, feat) in enumerate(normalized, start=start):
+                record = self._apply_normalized(ft, name, feat)
+                self.steps.append(record)
+                if keys:
+                    _store_prefix(keys[i], record)
+            return
+
+        pending: List[Tuple[str, Dict[str, Any], cq.Workplane]] = []
+
+        def flush() -> None:
+            if not pending:
+                return
+            self.solid = batched_cut(self.solid, [vol for _, _, vol in pending])
+            for name, feat, vol in pending:
+                self.steps.append(
+                    StepRecord(name=name, feature=feat, delta=GeometryDelta(solid=self.solid, removed=vol))
+                )
+            pending.clear()
+
+        for ft, name, feat in normalized:
+            if ft not in _BATCHABLE_CUT_FEATURES or (feat.get("params") or {}).get("mode", "cut") != "cut":
+                flush()
+                self.steps.append(self._apply_normalized(ft, name, feat))
+                continue
+
+            # solid=None → Boolean なしで工具ボリュームだけを受け取る
+            tool = get_apply_fn(ft)(None, feat, self.csys_index)
+            if tool.removed is None:
+                # 深さ 0 などの no-op
+                flush()
+                self.steps.append(
+                    StepRecord(name=name, feature=feat, delta=GeometryDelta(solid=self.solid))
+                )
+                continue
+            pending.append((name, feat, tool.removed))
 
-        # 履歴に追加
-        self.steps.append(StepRecord(name=name, feature=feature, delta=delta))
+        flush()
 
-    def apply_all_features(self, features: List[Dict[str, Any]]) -> None:
+    def apply_all_features_streaming(
+        self,
+        features: List[Dict[str, Any]],
+        sink: Callable[[int, StepRecord], None],
+    ) -> cq.Workplane:
         """
-        features 配列を順に適用。
+        features を順に適用し、各ステップが確定した時点で sink(step_no, record) に渡す。
+        step_no は 1 始まり。途中状態キャッシュから再開した分も先頭から順に sink へ渡す。
+
+        ステップは steps に溜めず、sink に渡したらここでは手放す
+        （長いパイプラインで全ステップの BRep をメモリに抱えない。
+        途中状態キャッシュは _PREFIX_CACHE_BYTES の範囲で別に持つ）。最終 solid を返す。
+        """
+        keys = self._prefix_keys(features)
+        start, resumed = self._resume_from_cache(keys, features, history=True)
+        for step_no, record in enumerate(resumed, start=1):
+            sink(step_no, record)
+        del resumed
+
+        for i, (ft, name, feat) in enumerate(_normalize(features[start:]), start=start):
+            record = self._apply_normalized(ft, name, feat)
+            if keys:
+                _store_prefix(keys[i], record)
+            sink(i + 1, record)
+        return self.solid
+
+    def _prefix_keys(self, features: List[Dict[str, Any]]) -> List[str]:
+        """
+        (stock, csys_list, feature_1, ..., feature_i) の累積 SHA-256 を i ごとに返す。
+        キャッシュ対象外（途中から適用する場合・キャッシュ無効）なら空リスト。
+        prefix_hash は 1 回使ったら捨てる（streaming は steps を残さないので、
+        2 回目の適用を「作ったばかりのコンテキスト」と取り違えないため）。
         """
+        prefix_hash, self.prefix_hash = self.prefix_hash, None
+        if prefix_hash is None or self.steps or _PREFIX_CACHE_BYTES <= 0:
+            return []
+        h = prefix_hash.copy()
+        keys: List[str] = []
         for feat in features:
-            self.apply_feature(feat)
+            h.update(orjson.dumps(feat, option=orjson.OPT_SORT_KEYS))
+            keys.append(h.hexdigest())
+        return keys
+
+    def _resume_from_cache(
+        self, keys: List[str], features: List[Dict[str, Any]], history: bool
+    ) -> Tuple[int, List[StepRecord]]:
+        """
+        キャッシュにある最長の途中状態から再開し、(適用済みの feature 数, その分の StepRecord) を返す。
+        キャッシュは prefix ごとに最後の状態（そのステップの StepRecord）しか持たないので、
+        history=True（各ステップの形状が要る）なら先頭から途切れずにキャッシュにある分だけ使う。
+        history=False なら最長一致から再開し、それより前のステップは形状なしの記録にする。
+        キャッシュ上の solid はそのまま使わず BRepBuilderAPI_Copy（Shape.copy）で複製する。
+        """
+        records: List[StepRecord] = []
+        if history:
+            for key in keys:
+                hit = _PREFIX_CACHE.get(key)
+                if hit is None:
+                    break
+                _PREFIX_CACHE.move_to_end(key)
+                records.append(hit[0])
+        else:
+            for i in range(len(keys) - 1, -1, -1):
+                hit = _PREFIX_CACHE.get(keys[i])
+                if hit is None:
+                    continue
+                _PREFIX_CACHE.move_to_end(keys[i])
+                records = [
+                    StepRecord(name=name, feature=feat, delta=GeometryDelta(solid=None))
+                    for _, name, feat in _normalize(features[:i])
+                ]
+                records.append(hit[0])
+                break
+
+        if records:
+            self.solid = _isolated_copy(records[-1].delta.solid)
+        return len(records), records
+
+
+# 途中状態キャッシュ（プロセス内 LRU）：prefix hash → (その時点の StepRecord, 概算サイズ bytes)。
+# NL で 1 フィーチャずつ足して再実行するとき、前回までの Boolean をやり直さない。
+# 上限はエントリ数ではなく形状の概算サイズの合計（ワーカーごと。0 で無効）。
+_PREFIX_CACHE_BYTES = int(os.getenv("PROCESS_CONTEXT_CACHE_BYTES", str(256 << 20)))
+_PREFIX_CACHE: "OrderedDict[str, Tuple[StepRecord, int]]" = OrderedDict()
+_prefix_cache_bytes = 0
+
+# 概算サイズ：face / edge / vertex 1 つあたりのバイト数（幾何 + トポロジー + 属性の目安）
+_BYTES_PER_SUBSHAPE = 2048
+
+
+def _shape_bytes(wp: Optional[cq.Workplane]) -> int:
+    """wp の形状のおおよそのメモリ量（face / edge / vertex の数 × _BYTES_PER_SUBSHAPE）。"""
+    if wp is None:
+        return 0
+    from OCP.TopAbs import TopAbs_EDGE, TopAbs_FACE, TopAbs_VERTEX
+    from OCP.TopExp import TopExp
+    from OCP.TopTools import TopTools_IndexedMapOfShape
+
+    n = 0
+    for obj in wp.vals():
+        if not isinstance(obj, cq.Shape):
+            continue
+        for kind in (TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX):
+            sub = TopTools_IndexedMapOfShape()
+            TopExp.MapShapes_s(obj.wrapped, kind, sub)
+            n += sub.Extent()
+    return n * _BYTES_PER_SUBSHAPE
+
+
+def _store_prefix(key: str, record: StepRecord) -> None:
+    """record（そのステップの solid / removed）を保存し、合計が上限を超えたら古いものから捨てる。"""
+    global _prefix_cache_bytes
+    if record.delta.solid is None:
+        return
+    size = _shape_bytes(record.delta.solid) + _shape_bytes(record.delta.removed)
+    if size > _PREFIX_CACHE_BYTES:
+        return
+
+    old = _PREFIX_CACHE.pop(key, None)
+    if old is not None:
+        _prefix_cache_bytes -= old[1]
+    _PREFIX_CACHE[key] = (record, size)
+    _prefix_cache_bytes += size
+    while _prefix_cache_bytes > _PREFIX_CACHE_BYTES:
+        _, (_, evicted) = _PREFIX_CACHE.popitem(last=False)
+        _prefix_cache_bytes -= evicted
+
+
+def _isolated_copy(solid: cq.Workplane) -> cq.Workplane:
+    """キャッシュ上の Workplane と ctx も TopoDS も共有しない複製。"""
+    return cq.Workplane(copy(solid.plane)).newObject([o.copy() for o in solid.vals()])
+
+
+def clear_prefix_cache() -> int:
+    """途中状態キャッシュを空にして、消したエントリ数を返す。"""
+    global _prefix_cache_bytes
+    n = len(_PREFIX_CACHE)
+    _PREFIX_CACHE.clear()
+    _prefix_cache_bytes = 0
+    return n
+
+
+def _step_name(feature: Dict[str, Any]) -> str:
+    return feature.get("name", feature.get("id", "UNKNOWN"))
+
+
+def _normalize(features: List[Dict[str, Any]]) -> List[Tuple[Any, str, Dict[str, Any]]]:
+    """適用ループの前に (feature_type, name, feature) を 1 回だけ取り出しておく。"""
+    return [(feat.get("feature_type"), _step_name(feat), feat) for feat in features]
+
+
+# 工具ボリュームが solid に依存しない（CSYS だけで決まる）ので batched_cut にまとめられる feature
+_BATCHABLE_CUT_FEATURES = frozenset({"planar_face", "pocket_rectangular", "simple_hole"})
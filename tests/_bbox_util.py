@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import cadquery as cq
+
+Bbox6 = Tuple[float, float, float, float, float, float]
+
+# Shape → bbox6。cq.Shape の == / hash は isSame（TShape + Location）なので、
+# 同じ形状・同じ配置の BoundingBox は 1 回だけ計算する（テスト中の形状は書き換えない前提）
+_BBOX_CACHE: Dict[cq.Shape, Bbox6] = {}
+
+
+def bbox6(wp: cq.Workplane) -> Bbox6:
+    """Workplane の BoundingBox を (xmin, xmax, ymin, ymax, zmin, zmax) で返す。"""
+    shape = wp.val()
+    hit = _BBOX_CACHE.get(shape)
+    if hit is not None:
+        return hit
+    bb = shape.BoundingBox()
+    out = (bb.xmin, bb.xmax, bb.ymin, bb.ymax, bb.zmin, bb.zmax)
+    _BBOX_CACHE[shape] = out
+    return out
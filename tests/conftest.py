@@ -0,0 +1,52 @@
+from __future__ import annotations
+from typing import Dict
+
+import cadquery as cq
+import pytest
+
+from api.csys import CsysDef, workplane_from_csys
+
+
+@pytest.fixture(scope="session")
+def big_box() -> cq.Workplane:
+    """仮の大きめブロック（100mm 角, 原点中心）。CadQuery の操作は新しい形状を返すので共有してよい。"""
+    return cq.Workplane("XY").box(100.0, 100.0, 100.0, centered=True)
+
+
+@pytest.fixture(scope="session")
+def wcs_csys() -> CsysDef:
+    """WCS (rpy=0, 原点)。"""
+    return CsysDef(
+        name="WCS",
+        role="world",
+        origin=(0.0, 0.0, 0.0),
+        rpy_deg=(0.0, 0.0, 0.0),
+    )
+
+
+@pytest.fixture
+def wcs_xy_wp(wcs_csys: CsysDef) -> cq.Workplane:
+    """
+    WCS の XY Workplane。Plane は workplane_from_csys 側でキャッシュ済み。
+    Workplane は ctx（pendingWires 等）を持つので、テストごとに新しいものを渡す。
+    """
+    return workplane_from_csys(wcs_csys, base_plane="XY")
+
+
+@pytest.fixture(scope="session")
+def a90c0_front_csys() -> CsysDef:
+    """
+    A90C0_FRONT 相当: X軸まわりに +90deg 回転。
+    （ローカル +Z が world -Y に向く）
+    """
+    return CsysDef(
+        name="A90C0_FRONT",
+        role="setup",
+        origin=(0.0, 0.0, 0.0),
+        rpy_deg=(90.0, 0.0, 0.0),
+    )
+
+
+@pytest.fixture(scope="session")
+def a90c0_csys_index(a90c0_front_csys: CsysDef) -> Dict[str, CsysDef]:
+    return {a90c0_front_csys.name: a90c0_front_csys}
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import math
+from typing import List
+
+import pytest
+
+from api.cad_ops import OpError, apply_drill_batch, apply_op, build_stock
+from api.models import Operation, Stock
+
+from _bbox_util import bbox6
+
+
+def _stock():
+    return build_stock(Stock(type="block", params={"w": 100.0, "d": 60.0, "h": 40.0}))
+
+
+def _drill(x: float, y: float, depth: float = 10.0, dia: float = 6.0) -> Operation:
+    return Operation(op="drill:hole", selector=">Z", params={"dia": dia, "depth": depth, "x": x, "y": y})
+
+
+def _removed_volume(removed) -> float:
+    return sum(s.Volume() for s in removed.vals())
+
+
+@pytest.mark.parametrize(
+    "ops",
+    [
+        pytest.param([_drill(-30.0, 0.0), _drill(0.0, 0.0, 50.0), _drill(30.0, 10.0)], id="disjoint"),
+        # 重なる穴は 1 つずつ apply_op に回す
+        pytest.param([_drill(0.0, 0.0), _drill(3.0, 0.0, 20.0), _drill(30.0, 10.0)], id="overlapping"),
+    ],
+)
+def test_drill_batch_matches_sequential_apply_op(ops: List[Operation]):
+    work = _stock()
+    removed_volume = 0.0
+    for op in ops:
+        work, removed = apply_op(work, op)
+        removed_volume += _removed_volume(removed)
+
+    after, removed = apply_drill_batch(_stock(), ops)
+
+    assert math.isclose(after.val().Volume(), work.val().Volume(), rel_tol=1e-9)
+    assert math.isclose(_removed_volume(removed), removed_volume, rel_tol=1e-9)
+    for a, b in zip(bbox6(after), bbox6(work)):
+        assert math.isclose(a, b, abs_tol=1e-6)
+
+    after_only, none = apply_drill_batch(_stock(), ops, with_removed=False)
+    assert none is None
+    assert math.isclose(after_only.val().Volume(), work.val().Volume(), rel_tol=1e-9)
+
+
+def test_drill_batch_rejects_other_ops():
+    mill = Operation(op="mill:profile", selector=">Z", params={"rect_w": 10.0, "rect_h": 10.0, "depth": 5.0})
+    with pytest.raises(OpError, match="drill:hole"):
+        apply_drill_batch(_stock(), [_drill(0.0, 0.0), mill])
+
+
+@pytest.mark.parametrize(
+    "op",
+    [
+        pytest.param(Operation(op="setup:index"), id="setup_index"),
+        pytest.param(Operation(op="xform:transform", params={"dx": 5.0}), id="xform_transform"),
+    ],
+)
+def test_non_cutting_ops_have_no_removed(op: Operation):
+    stock = _stock()
+    after, removed = apply_op(stock, op)
+
+    assert removed is None
+    assert math.isclose(after.val().Volume(), stock.val().Volume(), rel_tol=1e-9)
@@ -2,6 +2,7 @@ from __future__ import annotations
 import math
 
 import cadquery as cq
+import pytest
 
 from api.csys import CsysDef, workplane_from_csys
 from api.geometry.volume_3d import (
@@ -11,7 +12,9 @@ from api.geometry.volume_3d import (
 )
 
 # axis->vector は共通 util を参照
-from api.feature.common import axis_to_vector
+from api.feature.common import axis_to_vector, z_axis_sign
+
+from _bbox_util import bbox6
 
 # エイリアスをテスト内で使える形に用意
 planar_axis_to_vector = pocket_axis_to_vector = hole_axis_to_vector = axis_to_vector
@@ -20,12 +23,6 @@ planar_axis_to_vector = pocket_axis_to_vector = hole_axis_to_vector = axis_to_ve
 EPS = 1e-6
 
 
-def bbox6(wp: cq.Workplane):
-    """Workplane の BoundingBox を (xmin, xmax, ymin, ymax, zmin, zmax) で返す。"""
-    bb = wp.val().BoundingBox()
-    return bb.xmin, bb.xmax, bb.ymin, bb.ymax, bb.zmin, bb.zmax
-
-
 # -----------------------------
 # axis → ベクトルのユニットテスト
 # -----------------------------
@@ -42,19 +39,26 @@ def test_axis_to_vector_mapping():
         assert fn("-Y") == (0.0, -1.0, 0.0)
 
 
+def test_z_axis_sign_mapping():
+    assert z_axis_sign("+Z", error_cls=ValueError, message="bad axis") == 1.0
+    assert z_axis_sign(" -z ", error_cls=ValueError, message="bad axis") == -1.0
+
+
+@pytest.mark.parametrize("axis", ["+X", ["-Z"], {"axis": "-Z"}, None, -1])
+def test_z_axis_sign_rejects_with_error_cls(axis):
+    # hash できない値（list / dict）も TypeError ではなく error_cls になる
+    with pytest.raises(ValueError, match="bad axis"):
+        z_axis_sign(axis, error_cls=ValueError, message="bad axis")
+
+
 # -----------------------------
 # csys → Workplane の向きテスト
 # -----------------------------
 
 
-def test_workplane_from_csys_wcs_xy():
+def test_workplane_from_csys_wcs_xy(wcs_csys: CsysDef):
     """WCS (rpy=0) + base_plane='XY' では、Z軸が world Z と一致する想定。"""
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
+    csys = wcs_csys
 
     wp = workplane_from_csys(csys, base_plane="XY")
 
@@ -66,14 +70,9 @@ def test_workplane_from_csys_wcs_xy():
     assert math.isclose(zmax, 1.0, abs_tol=EPS)
 
 
-def test_workplane_from_csys_wcs_xz():
+def test_workplane_from_csys_wcs_xz(wcs_csys: CsysDef):
     """WCS + base_plane='XZ' では、厚み方向が world Y になることだけ確認する。"""
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
+    csys = wcs_csys
 
     wp = workplane_from_csys(csys, base_plane="XZ")
 
@@ -96,65 +95,39 @@ def test_workplane_from_csys_wcs_xz():
 # -----------------------------
 
 
-def test_extrude_profile_volume_minus_z():
+@pytest.mark.parametrize(
+    "depth, expected_zmin, expected_zmax",
+    [
+        (-5.0, -5.0, 0.0),  # axis='-Z': プロファイルは Z=0 にあり、Z=-depth 方向に伸びる
+        (5.0, 0.0, 5.0),    # axis='+Z': Z=+depth 方向に伸びる
+    ],
+)
+def test_extrude_profile_volume_direction(
+    big_box: cq.Workplane,
+    wcs_xy_wp: cq.Workplane,
+    depth: float,
+    expected_zmin: float,
+    expected_zmax: float,
+):
     """
-    pocket_rectangular axis='-Z', depth>0 のとき、
-    プロファイルは Z=0 にあり、押し出しは Z=-depth 方向に伸びる。
+    pocket_rectangular 相当: 符号付き depth の向きに押し出される。
     """
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
-    wp = workplane_from_csys(csys, base_plane="XY")
-
     # Z=0 上に 10x10 のプロファイルを作る
-    profile = wp.rect(10.0, 10.0)
+    profile = wcs_xy_wp.rect(10.0, 10.0)
 
-    # solid は仮の大きめブロック
-    solid = cq.Workplane("XY").box(100.0, 100.0, 100.0, centered=True)
+    # solid は仮の大きめブロック（session fixture）
     delta: GeometryDelta = extrude_profile_volume(
-        solid=solid,
+        solid=big_box,
         profile=profile,
-        depth=-5.0,
+        depth=depth,
         mode="cut",
     )
 
     assert delta.removed is not None
     xmin, xmax, ymin, ymax, zmin, zmax = bbox6(delta.removed)
 
-    assert math.isclose(zmax, 0.0, abs_tol=EPS)
-    assert math.isclose(zmin, -5.0, abs_tol=EPS)
-
-
-def test_extrude_profile_volume_plus_z():
-    """
-    pocket_rectangular axis='+Z', depth>0 のとき、
-    押し出しは Z=+depth 方向に伸びる。
-    """
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
-    wp = workplane_from_csys(csys, base_plane="XY")
-
-    profile = wp.rect(10.0, 10.0)
-    solid = cq.Workplane("XY").box(100.0, 100.0, 100.0, centered=True)
-    delta: GeometryDelta = extrude_profile_volume(
-        solid=solid,
-        profile=profile,
-        depth=5.0,
-        mode="cut",
-    )
-
-    assert delta.removed is not None
-    xmin, xmax, ymin, ymax, zmin, zmax = bbox6(delta.removed)
-
-    assert math.isclose(zmin, 0.0, abs_tol=EPS)
-    assert math.isclose(zmax, 5.0, abs_tol=EPS)
+    assert math.isclose(zmin, expected_zmin, abs_tol=EPS)
+    assert math.isclose(zmax, expected_zmax, abs_tol=EPS)
 
 
 # -----------------------------
@@ -162,57 +135,33 @@ def test_extrude_profile_volume_plus_z():
 # -----------------------------
 
 
-def test_cylinder_volume_minus_z():
-    """
-    simple_hole axis='-Z', depth>0 のとき、
-    円柱ボリュームは Z=0 から Z=-depth に向かって伸びる。
-    """
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
-    wp = workplane_from_csys(csys, base_plane="XY")
-    solid = cq.Workplane("XY").box(100.0, 100.0, 100.0, centered=True)
-    delta: GeometryDelta = cylinder_volume_apply(
-        solid=solid,
-        wp=wp,
-        diameter=10.0,
-        depth=-5.0,
-        mode="cut",
-    )
-
-    assert delta.removed is not None
-    xmin, xmax, ymin, ymax, zmin, zmax = bbox6(delta.removed)
-
-    assert math.isclose(zmax, 0.0, abs_tol=EPS)
-    assert math.isclose(zmin, -5.0, abs_tol=EPS)
-
-
-def test_cylinder_volume_plus_z():
+@pytest.mark.parametrize(
+    "depth, expected_zmin, expected_zmax",
+    [
+        (-5.0, -5.0, 0.0),  # axis='-Z': Z=0 から Z=-depth に向かって伸びる
+        (5.0, 0.0, 5.0),    # axis='+Z': Z=0 から Z=+depth に向かって伸びる
+    ],
+)
+def test_cylinder_volume_direction(
+    big_box: cq.Workplane,
+    wcs_xy_wp: cq.Workplane,
+    depth: float,
+    expected_zmin: float,
+    expected_zmax: float,
+):
     """
-    simple_hole axis='+Z', depth>0 のとき、
-    円柱ボリュームは Z=0 から Z=+depth に向かって伸びる。
+    simple_hole 相当: 円柱ボリュームは符号付き depth の向きに伸びる。
     """
-    csys = CsysDef(
-        name="WCS",
-        role="world",
-        origin=(0.0, 0.0, 0.0),
-        rpy_deg=(0.0, 0.0, 0.0),
-    )
-    wp = workplane_from_csys(csys, base_plane="XY")
-    solid = cq.Workplane("XY").box(100.0, 100.0, 100.0, centered=True)
     delta: GeometryDelta = cylinder_volume_apply(
-        solid=solid,
-        wp=wp,
+        solid=big_box,
+        wp=wcs_xy_wp,
         diameter=10.0,
-        depth=5.0,
+        depth=depth,
         mode="cut",
     )
 
     assert delta.removed is not None
     xmin, xmax, ymin, ymax, zmin, zmax = bbox6(delta.removed)
 
-    assert math.isclose(zmin, 0.0, abs_tol=EPS)
-    assert math.isclose(zmax, 5.0, abs_tol=EPS)
+    assert math.isclose(zmin, expected_zmin, abs_tol=EPS)
+    assert math.isclose(zmax, expected_zmax, abs_tol=EPS)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import asyncio
+from typing import List
+
+import httpx
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from api.llm_client import _parse_llm_json, _stream_completion
+
+
+def _sse(chunks: List[str]) -> bytes:
+    events = [
+        b"data: " + orjson.dumps({"choices": [{"delta": {"content": c}}]}) + b"\n\n" for c in chunks
+    ]
+    return b"".join(events) + b"data: [DONE]\n\n"
+
+
+def _stream(chunks: List[str]) -> str:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=_sse(chunks)))
+
+    async def run() -> str:
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await _stream_completion(client, "https://example.invalid/chat", {}, b"{}")
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        pytest.param(
+            ['{"stock": ', '{"type": "block"}}', " trailing"],
+            '{"stock": {"type": "block"}}',
+            id="first_value",
+        ),
+        # 説明文中の [..] は JSON として読めないので、その先の値まで読む
+        pytest.param(
+            ["Here is [the result", "]:\n```json\n", '{"stock": {"type": "block"}}', "\n```"],
+            '{"stock": {"type": "block"}}',
+            id="skips_bracketed_prose",
+        ),
+        pytest.param(
+            ['[see {"a": 1} below] ', '{"b": 2}'],
+            '{"a": 1}',
+            id="value_inside_prose_brackets",
+        ),
+    ],
+)
+def test_stream_completion_returns_first_parseable_value(chunks: List[str], expected: str):
+    assert _stream(chunks) == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        pytest.param('{"stock": {"type": "block"}}', {"stock": {"type": "block"}}, id="whole"),
+        pytest.param(
+            'Note [see below]: result\n```json\n{"stock": {"type": "block"}}\n```',
+            {"stock": {"type": "block"}},
+            id="skips_bracketed_prose",
+        ),
+    ],
+)
+def test_parse_llm_json_uses_first_parseable_value(content: str, expected):
+    assert _parse_llm_json(content, "stock") == expected
+
+
+@pytest.mark.parametrize(
+    "content, detail",
+    [
+        pytest.param("no json here", "did not return valid JSON", id="no_brackets"),
+        pytest.param("see [note] and {broken", "invalid JSON after extraction", id="only_unparseable"),
+    ],
+)
+def test_parse_llm_json_errors(content: str, detail: str):
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_llm_json(content, "stock")
+    assert exc_info.value.status_code == 502
+    assert detail in exc_info.value.detail
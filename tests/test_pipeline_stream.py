@@ -0,0 +1,92 @@
+from __future__ import annotations
+import queue
+from typing import Any, Dict, List
+
+import orjson
+import pytest
+
+import api.main as main
+import api.process_context as process_context
+from api.models import FeaturePipelineRequest
+from api.geometry.volume_3d import GeometryDelta
+from api.process_context import StepRecord, clear_prefix_cache
+
+
+def _hole(i: int) -> Dict[str, Any]:
+    return {
+        "feature_type": "simple_hole",
+        "id": f"F_HOLE_{i}",
+        "params": {"csys_id": "TOP", "origin_x": 20.0 * i - 20.0, "diameter": 6.0, "depth": 10.0, "axis": "-Z"},
+    }
+
+
+def _request(**overrides: Any) -> FeaturePipelineRequest:
+    return FeaturePipelineRequest(
+        stock={"type": "block", "params": {"w": 100.0, "d": 60.0, "h": 40.0}},
+        csys_list=[
+            {"name": "TOP", "origin": {"x": 0.0, "y": 0.0, "z": 40.0}, "rpy_deg": {"r": 0.0, "p": 0.0, "y": 0.0}},
+        ],
+        features=[_hole(i) for i in range(3)],
+        **overrides,
+    )
+
+
+def _drain(step_queue: "queue.Queue[bytes | None]") -> List[bytes]:
+    lines: List[bytes] = []
+    while (line := step_queue.get(timeout=60)) is not None:
+        lines.append(line)
+    return lines
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        pytest.param({"dry_run": True}, id="dry_run"),
+        pytest.param({"output_mode": "stl"}, id="export"),
+    ],
+)
+def test_stream_emits_first_step_before_last_feature_is_applied(monkeypatch, overrides):
+    clear_prefix_cache()
+    req = _request(**overrides)
+    last_id = req.features[-1]["id"]
+    step_queue: "queue.Queue[bytes | None]" = queue.Queue()
+    first_lines: List[bytes] = []
+
+    # 最後のフィーチャを適用する直前に、1 行目がもう届いているかを見る
+    real_get_apply_fn = process_context.get_apply_fn
+
+    def get_apply_fn(ft):
+        fn = real_get_apply_fn(ft)
+
+        def apply(solid, feature, csys_index):
+            if feature["id"] == last_id:
+                first_lines.append(step_queue.get(timeout=60))
+            return fn(solid, feature, csys_index)
+
+        return apply
+
+    monkeypatch.setattr(process_context, "get_apply_fn", get_apply_fn)
+    # ファイルは書かない（エクスポートの完了順と put の順だけを見る）
+    monkeypatch.setattr(main, "_export_shape", lambda wp, path, export_step: None)
+
+    res = main._run_pipeline_sync(req, step_queue)
+
+    assert res.status == "ok"
+    assert len(first_lines) == 1
+    lines = first_lines + _drain(step_queue)
+    assert [orjson.loads(line)["step"] for line in lines] == [1, 2, 3]
+    assert [s.step for s in res.steps] == [1, 2, 3]
+
+
+def test_export_gets_shapes_that_share_nothing_with_the_step(big_box):
+    removed = big_box.faces(">Z").workplane().hole(10.0, 20.0)
+    record = StepRecord(name="F_HOLE", feature={}, delta=GeometryDelta(solid=big_box, removed=removed))
+
+    detached = main._detached_record(record)
+
+    # 書き出し側でメッシュを書き込んでも、次のステップの Boolean が触る面とは別物
+    pairs = [(record.delta.solid, detached.delta.solid), (record.delta.removed, detached.delta.removed)]
+    for orig, copy in pairs:
+        assert copy.val().Volume() == pytest.approx(orig.val().Volume())
+        orig_faces = orig.val().Faces()
+        assert not any(f.isSame(g) for f in copy.val().Faces() for g in orig_faces)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import math
+from typing import Any, Dict
+
+import cadquery as cq
+import pytest
+
+from api.csys import CsysDef
+from api.feature import FeatureError
+from api.feature.pocket_rectangular import apply_pocket_rectangular_geometry
+from api.geometry.profile_2d import _ARC_SEGMENTS
+
+from _bbox_util import bbox6
+
+
+def _pocket(width: float, length: float, corner_radius: float, depth: float = 8.0) -> Dict[str, Any]:
+    return {
+        "feature_type": "pocket_rectangular",
+        "id": "F_POCKET",
+        "params": {
+            "csys_id": "WCS",
+            "width": width,
+            "length": length,
+            "corner_radius": corner_radius,
+            "depth": depth,
+            "axis": "-Z",
+            "mode": "cut",
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "width, length, corner_radius",
+    [
+        pytest.param(30.0, 20.0, 2.0, id="rounded_corners"),
+        pytest.param(30.0, 20.0, 10.0, id="full_round_slot"),
+        pytest.param(20.0, 20.0, 10.0, id="circle"),
+    ],
+)
+def test_pocket_corner_radius_volume_and_bbox(
+    big_box: cq.Workplane,
+    wcs_csys: CsysDef,
+    width: float,
+    length: float,
+    corner_radius: float,
+):
+    depth = 8.0
+    delta = apply_pocket_rectangular_geometry(
+        solid=big_box,
+        feature=_pocket(width, length, corner_radius, depth),
+        csys_index={"WCS": wcs_csys},
+    )
+    assert delta.removed is not None
+
+    # 角R は 1 か所 n 分割の折れ線なので、4 隅の r x r の正方形を
+    # 内接多角形 4 * (n/2) r² sin(π/2n) に置き換えた面積になる
+    n = _ARC_SEGMENTS
+    corners = 4.0 * (n / 2.0) * corner_radius ** 2 * math.sin(math.pi / (2.0 * n))
+    area = width * length - 4.0 * corner_radius ** 2 + corners
+    assert math.isclose(delta.removed.val().Volume(), area * depth, rel_tol=1e-6)
+    assert math.isclose(
+        big_box.val().Volume() - delta.solid.val().Volume(), area * depth, rel_tol=1e-6
+    )
+
+    xmin, xmax, ymin, ymax, zmin, zmax = bbox6(delta.removed)
+    assert math.isclose(xmax - xmin, width, abs_tol=1e-3)
+    assert math.isclose(ymax - ymin, length, abs_tol=1e-3)
+    assert math.isclose(zmin, -depth, abs_tol=1e-3)
+    assert math.isclose(zmax, 0.0, abs_tol=1e-3)
+
+
+def test_pocket_corner_radius_over_half_width_is_feature_error(
+    big_box: cq.Workplane,
+    wcs_csys: CsysDef,
+):
+    with pytest.raises(FeatureError, match="corner_radius"):
+        apply_pocket_rectangular_geometry(
+            solid=big_box,
+            feature=_pocket(30.0, 20.0, 10.5),
+            csys_index={"WCS": wcs_csys},
+        )
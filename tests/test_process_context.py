@@ -0,0 +1,176 @@
+from __future__ import annotations
+import math
+from typing import Any, Dict, List
+
+import pytest
+
+import api.process_context as process_context
+from api.process_context import ProcessContext, clear_prefix_cache
+
+from _bbox_util import bbox6
+
+
+# 100 x 60 x 40 の block（z = 0..40）と、上面（z = 40）に置いた CSYS
+_STOCK_REQ: Dict[str, Any] = {
+    "stock": {"type": "block", "params": {"w": 100.0, "d": 60.0, "h": 40.0}},
+    "csys_list": [
+        {
+            "name": "TOP",
+            "role": "setup",
+            "origin": {"x": 0.0, "y": 0.0, "z": 40.0},
+            "rpy_deg": {"r": 0.0, "p": 0.0, "y": 0.0},
+        }
+    ],
+}
+
+
+def _face(depth: float, mode: str = "cut", size: float = 120.0) -> Dict[str, Any]:
+    return {
+        "feature_type": "planar_face",
+        "id": f"F_FACE_{mode}",
+        "params": {"csys_id": "TOP", "depth": depth, "size_x": size, "size_y": size, "axis": "-Z", "mode": mode},
+    }
+
+
+def _pocket(x: float, depth: float) -> Dict[str, Any]:
+    return {
+        "feature_type": "pocket_rectangular",
+        "id": f"F_POCKET_{x}",
+        "params": {
+            "csys_id": "TOP", "origin_x": x, "origin_y": 0.0,
+            "width": 30.0, "length": 20.0, "corner_radius": 3.0, "depth": depth, "axis": "-Z",
+        },
+    }
+
+
+def _hole(x: float, y: float, depth: float) -> Dict[str, Any]:
+    return {
+        "feature_type": "simple_hole",
+        "id": f"F_HOLE_{x}_{y}",
+        "params": {"csys_id": "TOP", "origin_x": x, "origin_y": y, "diameter": 8.0, "depth": depth, "axis": "-Z"},
+    }
+
+
+def _run(features: List[Dict[str, Any]], batch_cuts: bool) -> ProcessContext:
+    # 途中状態キャッシュから再開すると比較にならないので、毎回空にしてから流す
+    clear_prefix_cache()
+    ctx = ProcessContext.from_request(_STOCK_REQ)
+    ctx.apply_all_features(features, batch_cuts=batch_cuts)
+    return ctx
+
+
+@pytest.mark.parametrize(
+    "features",
+    [
+        pytest.param(
+            [_face(2.0), _pocket(-20.0, 10.0), _hole(20.0, 0.0, 15.0), _hole(30.0, 15.0, 50.0)],
+            id="cuts_only",
+        ),
+        pytest.param(
+            [
+                _face(2.0),
+                _pocket(-20.0, 10.0),
+                # 深さ 0 相当の no-op（工具ボリュームなし）でバッチを閉じる
+                _pocket(20.0, 1e-12),
+                _hole(20.0, 0.0, 15.0),
+                # add は batched_cut にまとめられないのでバッチを閉じる
+                _face(5.0, mode="add", size=10.0),
+                _hole(0.0, 0.0, 20.0),
+                _hole(30.0, 15.0, 50.0),
+            ],
+            id="flush_on_noop_and_add",
+        ),
+    ],
+)
+def test_batch_cuts_matches_sequential(features: List[Dict[str, Any]]):
+    seq = _run(features, batch_cuts=False)
+    batched = _run(features, batch_cuts=True)
+
+    assert [s.name for s in batched.steps] == [s.name for s in seq.steps]
+    assert math.isclose(batched.solid.val().Volume(), seq.solid.val().Volume(), rel_tol=1e-6)
+    for a, b in zip(bbox6(batched.solid), bbox6(seq.solid)):
+        assert math.isclose(a, b, abs_tol=1e-6)
+
+
+# -----------------------------
+# 途中状態キャッシュ
+# -----------------------------
+
+
+def _count_applies(monkeypatch) -> List[str]:
+    """ProcessContext が実際に適用した feature id を記録する。"""
+    applied: List[str] = []
+    real_get_apply_fn = process_context.get_apply_fn
+
+    def get_apply_fn(ft):
+        fn = real_get_apply_fn(ft)
+
+        def apply(solid, feature, csys_index):
+            applied.append(feature["id"])
+            return fn(solid, feature, csys_index)
+
+        return apply
+
+    monkeypatch.setattr(process_context, "get_apply_fn", get_apply_fn)
+    return applied
+
+
+def test_prefix_cache_resumes_and_isolates_cached_solid(monkeypatch):
+    base = [_face(2.0), _pocket(-20.0, 10.0)]
+    expected = _run(base + [_hole(20.0, 0.0, 15.0)], batch_cuts=False)
+
+    _run(base, batch_cuts=False)
+    cached_volumes = {
+        key: record.delta.solid.val().Volume()
+        for key, (record, _) in process_context._PREFIX_CACHE.items()
+    }
+    assert len(cached_volumes) == len(base)
+
+    applied = _count_applies(monkeypatch)
+    ctx = ProcessContext.from_request(_STOCK_REQ)
+    ctx.apply_all_features(base + [_hole(20.0, 0.0, 15.0)])
+
+    # 先頭 2 つはキャッシュから再開し、穴だけを適用する
+    assert applied == ["F_HOLE_20.0_0.0"]
+    assert [s.name for s in ctx.steps] == [s.name for s in expected.steps]
+    assert math.isclose(ctx.solid.val().Volume(), expected.solid.val().Volume(), rel_tol=1e-9)
+
+    # 再開後の cut はキャッシュ上の solid を変えない
+    for key, volume in cached_volumes.items():
+        record, _ = process_context._PREFIX_CACHE[key]
+        assert math.isclose(record.delta.solid.val().Volume(), volume, rel_tol=1e-12)
+        assert not record.delta.solid.val().isSame(ctx.solid.val())
+
+
+def test_prefix_cache_evicts_by_estimated_size(monkeypatch):
+    features = [_face(2.0), _pocket(-20.0, 10.0), _hole(20.0, 0.0, 15.0)]
+    _run(features, batch_cuts=False)
+    sizes = [size for _, size in process_context._PREFIX_CACHE.values()]
+    assert len(sizes) == len(features)
+
+    budget = max(sizes) + 1
+    monkeypatch.setattr(process_context, "_PREFIX_CACHE_BYTES", budget)
+    _run(features, batch_cuts=False)
+
+    assert 0 < len(process_context._PREFIX_CACHE) < len(features)
+    assert process_context._prefix_cache_bytes <= budget
+    assert process_context._prefix_cache_bytes == sum(
+        size for _, size in process_context._PREFIX_CACHE.values()
+    )
+    # 残るのは最後に保存したステップ
+    newest, _ = next(reversed(process_context._PREFIX_CACHE.values()))
+    assert newest.name == features[-1]["id"]
+
+
+def test_streaming_keeps_no_steps_with_prefix_cache_enabled():
+    features = [_face(2.0), _pocket(-20.0, 10.0), _hole(20.0, 0.0, 15.0)]
+    clear_prefix_cache()
+    received: List[int] = []
+
+    ctx = ProcessContext.from_request(_STOCK_REQ)
+    ctx.apply_all_features_streaming(features, lambda step_no, record: received.append(step_no))
+
+    assert received == [1, 2, 3]
+    assert ctx.steps == []
+    # キャッシュには各 prefix の最後の状態だけが残る
+    assert len(process_context._PREFIX_CACHE) == len(features)
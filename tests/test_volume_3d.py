@@ -0,0 +1,49 @@
+from __future__ import annotations
+from typing import Callable
+
+import cadquery as cq
+import pytest
+
+from api.geometry.volume_3d import (
+    GeometryDelta,
+    _box_down,
+    _local_cylinder,
+    cylinder_volume_apply,
+    rect_extrude_volume,
+)
+
+
+def _shares_tshape(a: cq.Shape, b: cq.Shape) -> bool:
+    """a と b の面が 1 つでも同じ TShape を指していれば True（配置の違いは無視する）。"""
+    b_faces = b.Faces()
+    return any(f.wrapped.IsPartner(g.wrapped) for f in a.Faces() for g in b_faces)
+
+
+@pytest.mark.parametrize(
+    "apply, cached",
+    [
+        pytest.param(
+            lambda solid, wp: cylinder_volume_apply(solid, wp, diameter=6.0, depth=-8.0),
+            lambda: _local_cylinder(3.0, -8.0),
+            id="cylinder",
+        ),
+        pytest.param(
+            lambda solid, wp: rect_extrude_volume(solid, wp, width=10.0, length=6.0, depth=-8.0),
+            lambda: _box_down(10.0, 6.0, 8.0),
+            id="sharp_box",
+        ),
+    ],
+)
+def test_tool_volumes_do_not_share_the_cached_solid(
+    big_box: cq.Workplane,
+    wcs_xy_wp: cq.Workplane,
+    apply: Callable[[cq.Workplane, cq.Workplane], GeometryDelta],
+    cached: Callable[[], cq.Solid],
+):
+    first = apply(big_box, wcs_xy_wp)
+    second = apply(big_box, wcs_xy_wp.center(20.0, 0.0))
+
+    # 同じ寸法の工具はキャッシュから作るが、removed にも Boolean にもキャッシュ上の TShape は渡さない
+    for delta in (first, second):
+        assert not _shares_tshape(delta.removed.val(), cached())
+    assert not _shares_tshape(first.removed.val(), second.removed.val())
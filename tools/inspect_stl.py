@@ -1,60 +1,140 @@
-jimport sys
-import struct
+import math
+import mmap
 import os
+import re
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # fall back to array/struct decoding
+    np = None
+
+
+# one binary STL triangle (50 bytes): normal(3f), v1..v3(3x3f), attr(H)
+_STL_TRI_SIZE = 50
+# triangles reduced per NumPy chunk (bounds the temporaries for huge meshes)
+_CHUNK_TRIS = 1 << 20
+if np is not None:
+    _STL_TRI_DTYPE = np.dtype([('n', '<f4', (3,)), ('v', '<f4', (3, 3)), ('attr', '<u2')])
+
+# ASCII STL "vertex x y z" lines; malformed numbers never match and are skipped
+_NUM = rb'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+_VERTEX_RE = re.compile(rb'(?im)^\s*vertex\s+' + _NUM + rb'\s+' + _NUM + rb'\s+' + _NUM + rb'\s*$')
 
 
 def inspect_stl(path):
+    """Parse one STL file and return a result dict (printed by print_result)."""
     with open(path, 'rb') as f:
         header = f.read(80)
-        rest = f.read()
+        probe = f.read(2000)
     # Heuristic: if header starts with 'solid' and contains ascii 'facet', treat as ASCII
-    if header[:5].lower() == b'solid' and b'facet' in rest[:2000].lower():
-        # ASCII parse
-        coords = []
-        with open(path, 'r', errors='ignore') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) == 4 and parts[0].lower() == 'vertex':
-                    try:
-                        x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                        coords.append((x, y, z))
-                    except Exception:
-                        pass
-    else:
-        # binary STL
-        coords = []
-        if len(rest) < 4:
-            print('No triangles')
+    if header[:5].lower() == b'solid' and b'facet' in probe.lower():
+        # ASCII parse: one regex scan over the memory-mapped file
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if np is not None:
+                return _stats_numpy(path, _ascii_chunks(mm))
+            matches = _VERTEX_RE.findall(mm)
+        return _stats_flat(path, array('f', [float(v) for m in matches for v in m]))
+
+    # binary STL: parse straight out of the page cache via mmap (no full-file copy)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 84:
+            return {'path': path, 'message': 'No triangles'}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            num_tris = struct.unpack_from('<I', mm, 80)[0]
+            # truncated files: read only the complete triangles
+            num_tris = min(num_tris, (len(mm) - 84) // _STL_TRI_SIZE)
+            if np is not None:
+                return _stats_numpy(path, _binary_chunks(mm, num_tris))
+            return _stats_flat(path, _binary_vertices(mm, num_tris))
+
+
+def _binary_chunks(mm, num_tris):
+    """(count, 3, 3) vertex views of up to _CHUNK_TRIS triangles each (zero-copy)."""
+    for start in range(0, num_tris, _CHUNK_TRIS):
+        count = min(_CHUNK_TRIS, num_tris - start)
+        tris = np.frombuffer(mm, dtype=_STL_TRI_DTYPE, count=count,
+                             offset=84 + start * _STL_TRI_SIZE)
+        yield tris['v']
+
+
+def _ascii_chunks(mm):
+    """(count, 3) float32 arrays of up to 3 * _CHUNK_TRIS matched vertices each."""
+    matches = _VERTEX_RE.finditer(mm)
+    while True:
+        batch = [m.groups() for m in islice(matches, 3 * _CHUNK_TRIS)]
+        if not batch:
             return
-        num_tris = struct.unpack('<I', rest[:4])[0]
-        offs = 4
-        for i in range(num_tris):
-            if offs + 50 > len(rest):
-                break
-            # each triangle: normal(3f), v1(3f), v2(3f), v3(3f), attr(2)
-            data = rest[offs:offs+50]
-            vals = struct.unpack('<12fH', data)
-            # vertices at positions 3..11
-            v1 = (vals[3], vals[4], vals[5])
-            v2 = (vals[6], vals[7], vals[8])
-            v3 = (vals[9], vals[10], vals[11])
-            coords.extend([v1, v2, v3])
-            offs += 50
-
-    if not coords:
-        print('No vertices found in', path)
+        yield np.array(batch, dtype=np.float32)
+
+
+def _binary_vertices(buf, num_tris):
+    """Vertex floats of every triangle as one flat array('f'): x0, y0, z0, x1, ..."""
+    out = array('f')
+    # skip the header, the count and each triangle's normal; copy its 36 vertex bytes
+    with memoryview(buf) as mv:
+        for off in range(84 + 12, 84 + 12 + num_tris * _STL_TRI_SIZE, _STL_TRI_SIZE):
+            out.frombytes(mv[off:off + 36])
+    if sys.byteorder == 'big':
+        out.byteswap()
+    return out
+
+
+def _stats_numpy(path, chunks):
+    """Running min/max/sum over vertex chunks (last axis = xyz); the mesh is never held whole."""
+    count = 0
+    vmin = vmax = total = None
+    for v in chunks:
+        n = v.size // 3
+        if n == 0:
+            continue
+        axes = tuple(range(v.ndim - 1))
+        cmin, cmax = v.min(axis=axes), v.max(axis=axes)
+        # accumulate in float64 so the centroid of large meshes stays accurate
+        csum = v.sum(axis=axes, dtype=np.float64)
+        if count == 0:
+            vmin, vmax, total = cmin, cmax, csum
+        else:
+            vmin, vmax, total = np.minimum(vmin, cmin), np.maximum(vmax, cmax), total + csum
+        count += n
+    if count == 0:
+        return {'path': path, 'message': f'No vertices found in {path}'}
+    return {
+        'path': path,
+        'count': count,
+        'min': tuple(float(x) for x in vmin),
+        'max': tuple(float(x) for x in vmax),
+        'centroid': tuple(float(x) / count for x in total),
+    }
+
+
+def _stats_flat(path, coords):
+    count = len(coords) // 3
+    if count == 0:
+        return {'path': path, 'message': f'No vertices found in {path}'}
+    axes = (coords[0::3], coords[1::3], coords[2::3])
+    return {
+        'path': path,
+        'count': count,
+        'min': tuple(min(a) for a in axes),
+        'max': tuple(max(a) for a in axes),
+        'centroid': tuple(math.fsum(a) / count for a in axes),
+    }
+
+
+def print_result(result):
+    if 'message' in result:
+        print(result['message'])
         return
-    xs = [c[0] for c in coords]
-    ys = [c[1] for c in coords]
-    zs = [c[2] for c in coords]
-    xmin, xmax = min(xs), max(xs)
-    ymin, ymax = min(ys), max(ys)
-    zmin, zmax = min(zs), max(zs)
-    cx = sum(xs)/len(xs)
-    cy = sum(ys)/len(ys)
-    cz = sum(zs)/len(zs)
-    print('FILE:', path)
-    print('  COUNT vertices:', len(coords))
+    xmin, ymin, zmin = result['min']
+    xmax, ymax, zmax = result['max']
+    cx, cy, cz = result['centroid']
+    print('FILE:', result['path'])
+    print('  COUNT vertices:', result['count'])
     print(f'  X: {xmin:.6f} .. {xmax:.6f}  Y: {ymin:.6f} .. {ymax:.6f}  Z: {zmin:.6f} .. {zmax:.6f}')
     print(f'  CENTROID: ({cx:.6f}, {cy:.6f}, {cz:.6f})')
 
@@ -63,8 +143,17 @@ if __name__ == '__main__':
     if len(sys.argv) < 2:
         print('Usage: inspect_stl.py file1.stl [file2.stl ...]')
         sys.exit(1)
+    paths = []
     for p in sys.argv[1:]:
         if not os.path.exists(p):
             print('Not found:', p)
             continue
-        inspect_stl(p)
+        paths.append(p)
+    # files are independent: parse several in parallel, print in argument order
+    if len(paths) > 2:
+        with ProcessPoolExecutor() as ex:
+            results = list(ex.map(inspect_stl, paths))
+    else:
+        results = [inspect_stl(p) for p in paths]
+    for r in results:
+        print_result(r)